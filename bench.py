@@ -0,0 +1,270 @@
+# Mesures de performance sur des jeux de tâches synthétiques (1k à 1M tâches).
+#
+#   python bench.py                               stockage et glyphes, 1k/10k/100k tâches
+#   python bench.py --sizes 1000,1000000 --repeat 5 --output resultats.json
+#   python bench.py --render --xvfb               ajoute l'affichage, sous un écran virtuel Xvfb
+#   python bench.py --compare ancien.json         compare avec une mesure précédente
+#
+# Les résultats sont écrits en JSON (une entrée par mesure et par taille), ce
+# qui permet de comparer deux versions avec --compare.
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+from core import STATUTS, URGENCE_LEVELS, Task, build_date_index, get_start_of_week
+import storage
+
+WORDS = ["rapport", "réunion", "appel", "client", "budget", "revue", "courses", "dentiste",
+         "facture", "projet", "planning", "relance", "déploiement", "lecture", "sport"]
+
+def make_tasks(count, per_day=10, seed=42):
+    # Historique qui se termine aujourd'hui, avec per_day tâches par jour en moyenne
+    rng = random.Random(seed)
+    days = max(1, count // per_day)
+    today = datetime.date.today()
+    tasks = []
+    for i in range(count):
+        day = today - datetime.timedelta(days=rng.randrange(days))
+        tasks.append(Task(" ".join(rng.choice(WORDS) for _ in range(3)), f"Tâche synthétique n°{i}",
+                          day.toordinal(), rng.randrange(len(URGENCE_LEVELS)), rng.randrange(len(STATUTS))))
+    return tasks
+
+def measure(repeat, func, setup=None):
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+class Bench:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, name, size, func, setup=None):
+        times = measure(self.repeat, func, setup)
+        result = {"bench": name, "size": size, "seconds": times,
+                  "min": min(times), "median": statistics.median(times)}
+        self.results.append(result)
+        print(f"{name:<28} {size:>9}  min {result['min'] * 1000:10.2f} ms  médiane {result['median'] * 1000:10.2f} ms")
+        return result
+
+def week_range():
+    start = get_start_of_week(datetime.date.today())
+    return start.isoformat(), (start + datetime.timedelta(days=6)).isoformat()
+
+def bench_storage(bench, size, tasks):
+    first, last = week_range()
+    storage.JOURNAL_MODE = True
+    bench.run("save_tasks", size, lambda _: storage.save_tasks(tasks))
+    bench.run("load_tasks", size, lambda _: storage.load_tasks())
+    bench.run("build_date_index", size, lambda _: build_date_index(tasks))
+
+    def open_json(_):
+        store = storage.JsonStore()
+        store.load_range(first, last)
+        store.close()
+    for name in (storage.JOURNAL_FILE,):
+        if os.path.exists(name):
+            os.remove(name)
+    bench.run("json_store_open", size, open_json)
+
+    def write_journal():
+        # Journal le plus long possible avant compactage, rejoué à l'ouverture
+        storage.save_tasks(tasks)
+        if os.path.exists(storage.JOURNAL_FILE):
+            os.remove(storage.JOURNAL_FILE)
+        store = storage.JsonStore()
+        for task in list(store.tasks.values())[:storage.JOURNAL_COMPACT_EVERY - 1]:
+            before = task.copy()
+            task["statut"] = STATUTS[1]
+            store.update(task, before)
+        store.saver.close()
+    bench.run("json_store_open_journal", size, open_json, write_journal)
+
+    def fresh_db():
+        if os.path.exists(storage.DB_FILE):
+            os.remove(storage.DB_FILE)
+    def migrate(_):
+        storage.SqliteStore().close()
+    storage.save_tasks(tasks)
+    bench.run("sqlite_migrate", size, migrate, fresh_db)
+
+    def sqlite_week(_):
+        store = storage.SqliteStore()
+        store.load_range(first, last)
+        store.close()
+    bench.run("sqlite_open_week", size, sqlite_week)
+
+    def fresh_shards():
+        shutil.rmtree(storage.SHARD_DIR, ignore_errors=True)
+    bench.run("shards_migrate", size, lambda _: storage.ShardedStore().close(), fresh_shards)
+
+    def shards_week(_):
+        store = storage.ShardedStore()
+        store.load_range(first, last)
+        store.close()
+    bench.run("shards_open_week", size, shards_week)
+
+    def shards_edit(store):
+        # Une modification ne réécrit que le mois de la tâche
+        task = next(iter(store.tasks_by_date.values()))[0]
+        before = task.copy()
+        task["statut"] = STATUTS[1 - task.statut]
+        store.update(task, before)
+        store.close()
+    def open_shards():
+        store = storage.ShardedStore()
+        store.load_range(first, last)
+        return store
+    bench.run("shards_save_edit", size, shards_edit, open_shards)
+
+    def export_ndjson(_):
+        store = storage.JsonStore()
+        storage.export_tasks_to("export.ndjson", "NDJSON", store.iter_tasks())
+        store.close()
+    bench.run("export_ndjson", size, export_ndjson)
+
+def bench_render(bench, size, tasks):
+    import main
+    storage.JOURNAL_MODE = True
+    storage.save_tasks(tasks)
+    if os.path.exists(storage.JOURNAL_FILE):
+        os.remove(storage.JOURNAL_FILE)
+    apps = []
+    def start(_):
+        app = main.TaskManagerApp()
+        app.update()
+        apps.append(app)
+    bench.run("app_start", size, start)
+    for app in apps[1:]:
+        app.store.close()
+        app.destroy()
+    app = apps[0]
+
+    def settle(_=None):
+        app.update()  # traite aussi les rendus différés (pré-chargement des semaines)
+    bench.run("update_weekend_view", size, lambda _: (app.update_weekend_view(), app.update_idletasks()), settle)
+    bench.run("refresh_tasks", size, lambda _: (app.refresh_tasks(), app.update_idletasks()), settle)
+    def flip(_):
+        app.goto_next_week()
+        app.update_idletasks()
+        app.goto_prev_week()
+        app.update_idletasks()
+    bench.run("goto_next_prev_week", size, flip, settle)
+    app.store.close()
+    app.destroy()
+
+def bench_glyphs(bench):
+    try:
+        import main
+    except ImportError as exc:
+        print(f"glyphes ignorés : {exc}")
+        return
+    emojis = [emoji for emoji, _ in URGENCE_LEVELS]
+    main.GLYPH_CACHE_DIR = os.path.abspath("glyphs")
+    def cold():
+        shutil.rmtree(main.GLYPH_CACHE_DIR, ignore_errors=True)
+        disk()
+    def disk():
+        main._glyph_cache.clear()
+        main._emoji_fonts.clear()
+        main._glyph_fonts = None
+    run_all = lambda _: [main.emoji_img(e) for e in emojis]
+    bench.run("emoji_img_cold", len(emojis), run_all, cold)
+    bench.run("emoji_img_disk_cache", len(emojis), run_all, disk)
+    bench.run("emoji_img_memory_cache", len(emojis), run_all)
+
+def start_xvfb(display=":99"):
+    proc = subprocess.Popen(["Xvfb", display, "-screen", "0", "1280x800x24", "-nolisten", "tcp"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1)
+    if proc.poll() is not None:
+        raise SystemExit("Xvfb n'a pas pu démarrer")
+    os.environ["DISPLAY"] = display
+    return proc
+
+def compare(results, path):
+    with open(path, "r", encoding="utf-8") as f:
+        before = {(r["bench"], r["size"]): r for r in json.load(f)["results"]}
+    print(f"\nComparaison avec {path} (médianes, > 1 = plus lent) :")
+    for r in results:
+        old = before.get((r["bench"], r["size"]))
+        if old and old["median"]:
+            ratio = r["median"] / old["median"]
+            flag = "  <-- régression" if ratio > 1.2 else ""
+            print(f"{r['bench']:<28} {r['size']:>9}  x{ratio:6.2f}{flag}")
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesures de performance de TodoToday")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="tailles séparées par des virgules")
+    parser.add_argument("--per-day", type=int, default=10, help="tâches par jour dans l'historique synthétique")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--render", action="store_true", help="mesurer aussi l'affichage (écran requis)")
+    parser.add_argument("--xvfb", action="store_true", help="lancer un écran virtuel Xvfb pour --render")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="résultats JSON d'une exécution précédente")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    xvfb = start_xvfb() if args.xvfb else None
+    workdir = tempfile.mkdtemp(prefix="todotoday-bench-")
+    os.chdir(workdir)  # tasks.json, tasks.db et le journal sont relatifs au répertoire courant
+    bench = Bench(args.repeat)
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            tasks = make_tasks(size, args.per_day)
+            bench_storage(bench, size, tasks)
+            if args.render:
+                bench_render(bench, size, tasks)
+            for name in os.listdir(workdir):
+                path = os.path.join(workdir, name)
+                if os.path.isfile(path):
+                    os.remove(path)
+                else:
+                    shutil.rmtree(path)
+        bench_glyphs(bench)
+    finally:
+        os.chdir(os.path.dirname(output))
+        shutil.rmtree(workdir, ignore_errors=True)
+        if xvfb is not None:
+            xvfb.terminate()
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "per_day": args.per_day,
+        },
+        "results": bench.results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {output}")
+    if compare_path:
+        compare(bench.results, compare_path)
+
+if __name__ == "__main__":
+    main()
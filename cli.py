@@ -0,0 +1,187 @@
+# Interface en ligne de commande pour les traitements en masse : un seul
+# chargement et une seule écriture par appel, quel que soit le nombre de tâches.
+#
+#   python cli.py add taches.ndjson            (JSON, NDJSON, ou stdin avec « - »)
+#   python cli.py add --text --date 2025-03-10 < titres.txt
+#   python cli.py list --from 2025-01-01 --to 2025-03-31 --statut fait --format csv
+#   python cli.py move --from 2025-03-10 --to 2025-03-10 --vers 2025-03-11
+#   python cli.py done --au 2025-03-07 --urgence critique
+#   python cli.py convert todo.json            (ancien format, reprend après une interruption)
+import argparse
+import datetime
+import io
+import json
+import sys
+
+import perf
+from core import STATUTS, URGENCE_LEVELS, Occurrence, day_ordinal, fold_text, normalize_task, parse_urgence
+from storage import IMPORT_BATCH, EXPORT_FORMATS, LEGACY_FILE, convert_legacy, export_csv, export_json, export_ndjson, iter_json_array, open_store
+
+def iso_date(value):
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"date invalide (AAAA-MM-JJ attendu) : {value}")
+
+def urgence_arg(value):
+    try:
+        return parse_urgence(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc))
+
+def iter_input(f, text=False):
+    # Détecte un tableau JSON ou du NDJSON (un objet par ligne) ; --text : un titre par ligne
+    if text:
+        for line in io.TextIOWrapper(f, encoding="utf-8-sig"):
+            if line.strip():
+                yield {"titre": line.strip()}
+        return
+    head = f.peek(64).lstrip(b"\xef\xbb\xbf \t\r\n") if hasattr(f, "peek") else b""
+    if head.startswith(b"["):
+        yield from iter_json_array(f)
+        return
+    for line in io.TextIOWrapper(f, encoding="utf-8-sig"):
+        if line.strip():
+            yield json.loads(line)
+
+def cmd_add(store, args):
+    defaults = {"date": args.date, "urgence": args.urgence, "statut": STATUTS[0], "description": ""}
+    count = 0
+    store.begin_import("merge")
+    try:
+        batch = []
+        for path in args.files or ["-"]:
+            f = sys.stdin.buffer if path == "-" else open(path, "rb")
+            try:
+                for obj in iter_input(f, args.text):
+                    if isinstance(obj, dict):
+                        obj = {**defaults, **obj}
+                    batch.append(normalize_task(obj))
+                    if len(batch) >= IMPORT_BATCH:
+                        store.import_batch(batch)
+                        count += len(batch)
+                        batch = []
+            finally:
+                if f is not sys.stdin.buffer:
+                    f.close()
+        store.import_batch(batch)
+        count += len(batch)
+    except Exception:
+        store.abort_import()
+        raise
+    store.end_import()
+    print(f"{count} tâches ajoutées")
+
+def selected(store, args):
+    # Tâches enregistrées seulement, comme iter_tasks : pas les occurrences des répétitions
+    tasks = [t for t in store.select(args.first, args.last, args.statut, args.urgence)
+             if not isinstance(t, Occurrence)]
+    if args.titre:
+        needle = fold_text(args.titre)
+        tasks = [t for t in tasks if needle in fold_text(t.titre)]
+    return tasks
+
+def cmd_list(store, args):
+    if args.titre:
+        tasks = iter(selected(store, args))
+    else:
+        tasks = store.iter_tasks(args.first, args.last, args.statut, args.urgence)
+    if args.format == "table":
+        for task in tasks:
+            print(f"{task['date']}  {task['urgence']}  [{task['statut']}]  {task['titre']}")
+        return
+    writer = {"json": export_json, "ndjson": export_ndjson, "csv": export_csv}[args.format]
+    writer(tasks, sys.stdout)
+
+def cmd_move(store, args):
+    if not (args.vers or args.decaler):
+        raise SystemExit("move : indiquer --vers ou --decaler")
+    changes = []
+    for task in selected(store, args):
+        before = task.copy()
+        task.day = day_ordinal(args.vers) if args.vers else task.day + args.decaler
+        changes.append((task, before))
+    store.update_many(changes)
+    print(f"{len(changes)} tâches déplacées")
+
+def cmd_done(store, args):
+    changes = []
+    for task in selected(store, args):
+        if task["statut"] != STATUTS[1]:
+            before = task.copy()
+            task["statut"] = STATUTS[1]
+            changes.append((task, before))
+    store.update_many(changes)
+    print(f"{len(changes)} tâches marquées comme faites")
+
+def cmd_convert(store, args):
+    def progress(days, added):
+        print(f"\r{days} jours lus, {added} tâches ajoutées", end="", file=sys.stderr, flush=True)
+    added, present, invalid = convert_legacy(store, args.file, progress)
+    print(file=sys.stderr)
+    print(f"{added} tâches ajoutées, {present} déjà présentes")
+    if invalid:
+        print(f"{invalid} jours ignorés (date illisible)")
+
+def add_filters(parser):
+    parser.add_argument("--from", "--du", dest="first", type=iso_date, help="date de début incluse")
+    parser.add_argument("--to", "--au", dest="last", type=iso_date, help="date de fin incluse")
+    parser.add_argument("--statut", choices=STATUTS)
+    parser.add_argument("--urgence", type=urgence_arg, help="emoji, libellé ou rang 1-4")
+    parser.add_argument("--titre", help="texte contenu dans le titre (sans tenir compte de la casse ni des accents)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Traitements en masse sur tasks.json (ou tasks.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", aliases=["ajouter"], help="ajouter des tâches depuis des fichiers ou stdin")
+    add.add_argument("files", nargs="*", help="fichiers JSON ou NDJSON, « - » pour stdin (défaut)")
+    add.add_argument("--text", action="store_true", help="une tâche par ligne, la ligne est le titre")
+    add.add_argument("--date", type=iso_date, default=datetime.date.today().isoformat(),
+                     help="date des tâches qui n'en ont pas (défaut : aujourd'hui)")
+    add.add_argument("--urgence", type=urgence_arg, default=URGENCE_LEVELS[0][0],
+                     help="urgence des tâches qui n'en ont pas")
+    add.set_defaults(func=cmd_add)
+
+    lst = sub.add_parser("list", aliases=["lister"], help="lister les tâches filtrées")
+    add_filters(lst)
+    lst.add_argument("--format", choices=["table"] + [fmt.lower() for fmt in EXPORT_FORMATS], default="table")
+    lst.set_defaults(func=cmd_list)
+
+    move = sub.add_parser("move", aliases=["deplacer"], help="déplacer les tâches filtrées")
+    add_filters(move)
+    target = move.add_mutually_exclusive_group()
+    target.add_argument("--vers", type=iso_date, help="nouvelle date")
+    target.add_argument("--decaler", type=int, help="décalage en jours (négatif pour avancer)")
+    move.set_defaults(func=cmd_move)
+
+    done = sub.add_parser("done", aliases=["terminer"], help="marquer les tâches filtrées comme faites")
+    add_filters(done)
+    done.set_defaults(func=cmd_done)
+
+    convert = sub.add_parser("convert", aliases=["convertir"], help="reprendre l'ancien todo.json (TodoToday 0.1beta4)")
+    convert.add_argument("file", nargs="?", default=LEGACY_FILE, help=f"fichier à convertir (défaut : {LEGACY_FILE})")
+    convert.set_defaults(func=cmd_convert)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    perf.start_profile()
+    store = open_store()
+    try:
+        try:
+            args.func(store, args)
+        finally:
+            exc = store.flush()
+            store.close()
+    except ValueError as error:
+        # Tâche invalide (date, urgence...) : une ligne, comme les erreurs d'arguments
+        parser.exit(2, f"{parser.prog}: error: {error}\n")
+    if exc is not None:
+        print(f"Impossible d'enregistrer les tâches : {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
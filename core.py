@@ -0,0 +1,366 @@
+# Modèle et requêtes sur les tâches, sans aucune dépendance graphique :
+# utilisable depuis un script sans charger customtkinter, tkcalendar ni PIL.
+import bisect
+import calendar
+import datetime
+import re
+import unicodedata
+
+URGENCE_LEVELS = [
+    ("🟢", "Faible"),
+    ("🟡", "Moyen"),
+    ("🟠", "Élevé"),
+    ("🔥", "Critique")
+]
+STATUTS = ["à faire", "fait"]
+RECURRENCES = ["chaque jour", "jours ouvrés", "chaque semaine", "chaque mois"]
+TASK_FIELDS = ("titre", "description", "date", "urgence", "statut")
+URGENCE_RANKS = {emoji: rank for rank, (emoji, _) in enumerate(URGENCE_LEVELS)}
+STATUT_RANKS = {statut: rank for rank, statut in enumerate(STATUTS)}
+COUNT_SLOTS = len(STATUTS) * len(URGENCE_LEVELS)  # Compteurs par jour : un par (statut, urgence)
+SEARCH_LIMIT = 200  # Résultats renvoyés au plus par une recherche
+WORD_RE = re.compile(r"\w+")
+
+# Partagés entre toutes les tâches d'un même jour : un seul int et une seule
+# chaîne par date au lieu d'un objet par tâche
+_day_ordinals = {}
+_day_strings = {}
+
+def day_ordinal(date_str):
+    day = _day_ordinals.get(date_str)
+    if day is None:
+        day = datetime.date.fromisoformat(date_str).toordinal()
+        date_str = day_string(day)
+        _day_ordinals[date_str] = day
+    return day
+
+def day_string(day):
+    date_str = _day_strings.get(day)
+    if date_str is None:
+        date_str = _day_strings[day] = datetime.date.fromordinal(day).isoformat()
+    return date_str
+
+class Task:
+    # Tâche compacte : la date est un ordinal (date.toordinal()), l'urgence et
+    # le statut des rangs dans URGENCE_LEVELS et STATUTS, ce qui rend les
+    # comparaisons entières. task["date"], task["urgence"]... donnent la forme
+    # JSON (chaîne AAAA-MM-JJ, emoji, libellé), celle des fichiers et de l'affichage.
+    # id est attribué par le stockage et ne change plus : deux tâches identiques
+    # restent distinctes, et une tâche se retrouve sans parcourir la liste.
+    __slots__ = ("titre", "description", "day", "urgence", "statut", "id")
+
+    def __init__(self, titre, description, day, urgence=0, statut=0, task_id=None):
+        self.titre = titre
+        self.description = description
+        self.day = day
+        self.urgence = urgence
+        self.statut = statut
+        self.id = task_id
+
+    @classmethod
+    def from_dict(cls, obj):
+        if not isinstance(obj, dict) or not isinstance(obj.get("date"), str):
+            raise ValueError(f"tâche invalide : {str(obj)[:80]}")
+        task_id = obj.get("id")
+        if task_id is not None and type(task_id) is not int:
+            raise ValueError(f"tâche invalide : {str(obj)[:80]}")
+        try:
+            return cls(obj.get("titre", ""), obj.get("description", ""), day_ordinal(obj["date"]),
+                       URGENCE_RANKS[obj.get("urgence", URGENCE_LEVELS[0][0])],
+                       STATUT_RANKS[obj.get("statut", STATUTS[0])], task_id)
+        except (KeyError, ValueError):
+            raise ValueError(f"tâche invalide : {str(obj)[:80]}") from None
+
+    @classmethod
+    def from_values(cls, titre, description, date, urgence, statut, task_id=None):
+        # Valeurs dans l'ordre de TASK_FIELDS, déjà validées (lignes SQL)
+        return cls(titre, description, day_ordinal(date), URGENCE_RANKS[urgence], STATUT_RANKS[statut], task_id)
+
+    def values(self):
+        return (self.titre, self.description, day_string(self.day),
+                URGENCE_LEVELS[self.urgence][0], STATUTS[self.statut])
+
+    def to_dict(self):
+        data = {"titre": self.titre, "description": self.description, "date": day_string(self.day),
+                "urgence": URGENCE_LEVELS[self.urgence][0], "statut": STATUTS[self.statut]}
+        if self.id is not None:
+            data["id"] = self.id
+        return data
+
+    def copy(self):
+        return Task(self.titre, self.description, self.day, self.urgence, self.statut, self.id)
+
+    def __getitem__(self, field):
+        if field == "date":
+            return day_string(self.day)
+        if field == "urgence":
+            return URGENCE_LEVELS[self.urgence][0]
+        if field == "statut":
+            return STATUTS[self.statut]
+        if field in ("titre", "description"):
+            return getattr(self, field)
+        raise KeyError(field)
+
+    def __setitem__(self, field, value):
+        if field == "date":
+            self.day = day_ordinal(value)
+        elif field == "urgence":
+            self.urgence = URGENCE_RANKS[value]
+        elif field == "statut":
+            self.statut = STATUT_RANKS[value]
+        elif field in ("titre", "description"):
+            setattr(self, field, value)
+        else:
+            raise KeyError(field)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def __repr__(self):
+        return f"Task({self.to_dict()!r})"
+
+class Occurrence(Task):
+    # Occurrence d'une tâche répétée, calculée pour les semaines affichées.
+    # origin est le jour prévu par la règle : la clé de ses modifications.
+    __slots__ = ("rule", "origin")
+
+    def __init__(self, rule, origin, *values):
+        super().__init__(*values)
+        self.rule = rule
+        self.origin = origin
+
+class Recurrence:
+    # Tâche répétée, enregistrée une seule fois. Les jours supprimés sont des
+    # exceptions, les occurrences modifiées (statut, titre, jour...) des
+    # modifications ; aucune occurrence n'est enregistrée en tant que tâche.
+    def __init__(self, rule_id, titre, description, urgence, frequence, start, until=None,
+                 exceptions=(), overrides=None):
+        self.id = rule_id
+        self.titre = titre
+        self.description = description
+        self.urgence = urgence
+        self.frequence = frequence
+        self.start = start
+        self.until = until
+        self.exceptions = set(exceptions)
+        self.overrides = overrides or {}  # jour prévu -> champs modifiés (forme JSON)
+
+    @classmethod
+    def from_dict(cls, obj):
+        try:
+            if obj["frequence"] not in RECURRENCES:
+                raise ValueError(obj["frequence"])
+            return cls(obj["id"], obj.get("titre", ""), obj.get("description", ""),
+                       URGENCE_RANKS[obj.get("urgence", URGENCE_LEVELS[0][0])], obj["frequence"],
+                       day_ordinal(obj["debut"]), day_ordinal(obj["fin"]) if obj.get("fin") else None,
+                       (day_ordinal(d) for d in obj.get("exceptions", [])),
+                       {day_ordinal(d): fields for d, fields in obj.get("modifications", {}).items()})
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"répétition invalide : {str(obj)[:80]}") from None
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "titre": self.titre,
+            "description": self.description,
+            "urgence": URGENCE_LEVELS[self.urgence][0],
+            "frequence": self.frequence,
+            "debut": day_string(self.start),
+            "fin": day_string(self.until) if self.until is not None else None,
+            "exceptions": [day_string(d) for d in sorted(self.exceptions)],
+            "modifications": {day_string(d): dict(fields) for d, fields in sorted(self.overrides.items())},
+        }
+
+    def scheduled(self, day):
+        if day < self.start or self.until is not None and day > self.until or day in self.exceptions:
+            return False
+        if self.frequence == "chaque jour":
+            return True
+        if self.frequence == "jours ouvrés":
+            return (day - 1) % 7 < 5  # l'ordinal 1 est un lundi
+        if self.frequence == "chaque semaine":
+            return (day - self.start) % 7 == 0
+        # Chaque mois : même quantième, ou dernier jour des mois plus courts
+        date = datetime.date.fromordinal(day)
+        wanted = datetime.date.fromordinal(self.start).day
+        return date.day == min(wanted, calendar.monthrange(date.year, date.month)[1])
+
+    def base_occurrence(self, origin):
+        return Occurrence(self, origin, self.titre, self.description, origin, self.urgence, 0)
+
+    def occurrence(self, origin):
+        occurrence = self.base_occurrence(origin)
+        for field, value in self.overrides.get(origin, {}).items():
+            occurrence[field] = value
+        return occurrence
+
+    def occurrences(self, first, last):
+        # Occurrences dont le jour (éventuellement modifié) tombe entre first et last
+        end = last if self.until is None else min(last, self.until)
+        for day in range(max(first, self.start), end + 1):
+            if self.scheduled(day):
+                occurrence = self.occurrence(day)
+                if first <= occurrence.day <= last:
+                    yield occurrence
+        for origin, fields in self.overrides.items():
+            if ("date" in fields and not first <= origin <= last
+                    and first <= day_ordinal(fields["date"]) <= last and self.scheduled(origin)):
+                yield self.occurrence(origin)
+
+def normalize_task(obj):
+    return Task.from_dict(obj)
+
+def assign_ids(tasks):
+    # Complète les identifiants absents (fichier antérieur aux identifiants) ou
+    # en double (fichier copié à la main) ; renvoie le prochain identifiant
+    # libre et le nombre d'identifiants attribués
+    next_id = max((t.id for t in tasks if t.id is not None), default=0) + 1
+    seen = set()
+    assigned = 0
+    for task in tasks:
+        if task.id is None or task.id in seen:
+            task.id = next_id
+            next_id += 1
+            assigned += 1
+        seen.add(task.id)
+    return next_id, assigned
+
+def build_date_index(tasks):
+    # Index jour (ordinal) -> tâches, pour ne lire que les jours affichés
+    index = {}
+    for task in tasks:
+        index.setdefault(task.day, []).append(task)
+    return index
+
+def count_slot(task):
+    return task.statut * len(URGENCE_LEVELS) + task.urgence
+
+def build_day_counts(tasks):
+    # Jour (ordinal) -> nombre de tâches par (statut, urgence), rang count_slot
+    counts = {}
+    for task in tasks:
+        day_counts = counts.get(task.day)
+        if day_counts is None:
+            day_counts = counts[task.day] = [0] * COUNT_SLOTS
+        day_counts[count_slot(task)] += 1
+    return counts
+
+def get_start_of_week(any_date):
+    return any_date - datetime.timedelta(days=(any_date.weekday()))
+
+def parse_urgence(value):
+    # Accepte l'emoji, le libellé (« critique ») ou le rang de 1 à 4
+    for rank, (emoji, label) in enumerate(URGENCE_LEVELS, start=1):
+        if value in (emoji, str(rank)) or value.casefold() == label.casefold():
+            return emoji
+    raise ValueError(f"urgence inconnue : {value}")
+
+def day_range(first, last):
+    # Jours (ordinaux) de first à last inclus, dates au format AAAA-MM-JJ
+    return range(day_ordinal(first), day_ordinal(last) + 1)
+
+_folded = {}  # mot accentué -> forme repliée ; ces mots se répètent d'une tâche à l'autre
+# Ligatures que NFKD ne décompose pas (ß est déjà « ss » après casefold) ;
+# l'index SQLite fait le même remplacement (storage.SQL_LIGATURES)
+LIGATURES = str.maketrans({"œ": "oe", "æ": "ae"})
+
+def fold_text(text):
+    # « Élève », « eleve » et « ÉLÈVE » donnent la même forme, « cœur » et « coeur » aussi
+    decomposed = unicodedata.normalize("NFKD", text.casefold().translate(LIGATURES))
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+def search_terms(text):
+    terms = []
+    for word in WORD_RE.findall(text):
+        if word.isascii():
+            terms.append(word.lower())
+            continue
+        folded = _folded.get(word)
+        if folded is None:
+            folded = _folded[word] = fold_text(word)
+        terms.append(folded)
+    return terms
+
+class SearchIndex:
+    # Index inversé mot -> tâches sur le titre et la description. Le dernier mot
+    # de la requête est pris comme préfixe, pour chercher pendant la frappe.
+    def __init__(self, tasks=()):
+        self.postings = {}  # mot -> ensemble de tâches
+        self.terms = {}  # tâche -> mots indexés (le texte a pu changer depuis)
+        self.vocabulary = []  # mots triés, pour la recherche par préfixe
+        self.extend(tasks)
+
+    def extend(self, tasks):
+        # Ajout en nombre : les mots nouveaux sont triés entre eux, puis fusionnés
+        # au vocabulaire (deux suites triées : sort les fusionne en temps linéaire)
+        new = []
+        for task in tasks:
+            new.extend(self.index(task))
+        if new:
+            new.sort()
+            self.vocabulary.extend(new)
+            self.vocabulary.sort()
+
+    def index(self, task):
+        terms = frozenset(search_terms(f"{task.titre} {task.description}"))
+        self.terms[task] = terms
+        new = []
+        for term in terms:
+            bucket = self.postings.get(term)
+            if bucket is None:
+                bucket = self.postings[term] = set()
+                new.append(term)
+            bucket.add(task)
+        return new
+
+    def add(self, task):
+        for term in self.index(task):
+            bisect.insort(self.vocabulary, term)
+
+    def remove(self, task):
+        for term in self.terms.pop(task, ()):
+            bucket = self.postings[term]
+            bucket.discard(task)
+            if not bucket:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+
+    def update(self, task):
+        self.remove(task)
+        self.add(task)
+
+    def prefixed(self, prefix):
+        i = bisect.bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            yield self.postings[self.vocabulary[i]]
+            i += 1
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        terms = search_terms(query)
+        if not terms:
+            return []
+        *words, prefix = terms
+        sets = [self.postings.get(word, set()) for word in words]
+        sets.append(set().union(*self.prefixed(prefix)))
+        sets.sort(key=len)
+        found = sets[0].intersection(*sets[1:])
+        # Les plus récentes d'abord
+        return sorted(found, key=lambda t: t.day, reverse=True)[:limit]
+
+def filter_tasks(tasks, first=None, last=None, statut=None, urgence=None):
+    # Les critères sont convertis une fois ; la boucle ne compare que des entiers
+    first = day_ordinal(first) if first else None
+    last = day_ordinal(last) if last else None
+    statut = STATUT_RANKS[statut] if statut else None
+    urgence = URGENCE_RANKS[urgence] if urgence else None
+    for task in tasks:
+        if first is not None and task.day < first or last is not None and task.day > last:
+            continue
+        if statut is not None and task.statut != statut:
+            continue
+        if urgence is not None and task.urgence != urgence:
+            continue
+        yield task
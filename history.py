@@ -0,0 +1,159 @@
+# Annuler / rétablir (Ctrl+Z / Ctrl+Y). Chaque action garde seulement de quoi
+# l'inverser : les tâches touchées (copies avant/après pour une modification),
+# l'état d'une seule règle pour une répétition, jamais la liste entière. Un
+# import est une seule étape : les tâches importées, plus les anciennes si
+# l'import a tout remplacé.
+import itertools
+
+from core import Occurrence, Recurrence
+
+HISTORY_LIMIT = 100  # Actions annulables au plus
+HISTORY_MAX_TASKS = 200000  # Tâches gardées au plus, toutes actions confondues
+
+def assign_values(task, values):
+    task.titre = values.titre
+    task.description = values.description
+    task.day = values.day
+    task.urgence = values.urgence
+    task.statut = values.statut
+
+class History:
+    # Façade des modifications faites depuis l'interface. Une étape est une
+    # liste d'opérations (genre, avant, après), rejouée à l'envers pour annuler :
+    #   "tasks"  tâches absentes / présentes (ajout, suppression, import ajouté)
+    #   "all"    toutes les tâches avant / après un import qui a tout remplacé
+    #   "update" copies des tâches modifiées, avant / après
+    #   "rule"   état JSON d'une règle de répétition avant / après (None : absente)
+    # Toutes les tâches gardées sont des copies, recopiées à chaque restauration :
+    # l'interface peut modifier les objets chargés sans toucher à l'historique.
+    def __init__(self, store):
+        self.store = store
+        self.undo_stack = []  # (opérations, nombre de tâches gardées)
+        self.redo_stack = []
+        self.kept = 0
+        self.importing = None
+
+    def record(self, *ops):
+        size = sum(len(before or ()) + len(after or ()) for kind, before, after in ops if kind != "rule")
+        self.kept += size - sum(step_size for _, step_size in self.redo_stack)
+        self.undo_stack.append((ops, size))
+        self.redo_stack = []
+        while self.undo_stack and (len(self.undo_stack) > HISTORY_LIMIT or self.kept > HISTORY_MAX_TASKS):
+            self.kept -= self.undo_stack.pop(0)[1]
+
+    def clear(self):
+        self.undo_stack, self.redo_stack, self.kept = [], [], 0
+
+    def undo(self):
+        if not self.undo_stack:
+            return False
+        step = self.undo_stack.pop()
+        for kind, before, after in reversed(step[0]):
+            self.apply(kind, after, before)
+        self.redo_stack.append(step)
+        return True
+
+    def redo(self):
+        if not self.redo_stack:
+            return False
+        step = self.redo_stack.pop()
+        for kind, before, after in step[0]:
+            self.apply(kind, before, after)
+        self.undo_stack.append(step)
+        return True
+
+    def apply(self, kind, current, target):
+        # Ramène le stockage de l'état current à l'état target
+        store = self.store
+        if kind == "rule":
+            rule_id = (target or current)["id"]
+            if target is None:
+                store.recurrences.pop(rule_id, None)
+            else:
+                store.recurrences[rule_id] = Recurrence.from_dict(target)
+            store.persist_recurrences()
+        elif kind == "update":
+            changes = []
+            for now, wanted in zip(current, target):
+                # La tâche affichée peut ne plus être chargée : le stockage la retrouve par son id
+                task = store.get(now.id) or now.copy()
+                before = task.copy()
+                assign_values(task, wanted)
+                changes.append((task, before))
+            if len(changes) == 1:
+                store.update(*changes[0])
+            else:
+                store.update_many(changes)
+        elif kind == "all":
+            store.restore([task.copy() for task in target], replace=True)
+        elif target:
+            store.restore([task.copy() for task in target])
+        else:
+            store.delete_many([store.get(task.id) or task for task in current])
+
+    def rule_state(self, rule):
+        return rule.to_dict() if rule.id in self.store.recurrences else None
+
+    def add(self, task):
+        self.store.add(task)
+        self.record(("tasks", [], [task.copy()]))
+
+    def update(self, task, before):
+        if isinstance(task, Occurrence):
+            old = task.rule.to_dict()
+            self.store.update(task, before)
+            self.record(("rule", old, self.rule_state(task.rule)))
+            return
+        self.store.update(task, before)
+        self.record(("update", [before], [task.copy()]))
+
+    def delete(self, task):
+        self.store.delete(task)
+        self.record(("tasks", [task.copy()], []))
+
+    def add_recurrence(self, rule):
+        self.store.add_recurrence(rule)
+        self.record(("rule", None, rule.to_dict()))
+
+    def delete_occurrence(self, occurrence, series=False):
+        rule = occurrence.rule
+        old = rule.to_dict()
+        self.store.delete_occurrence(occurrence, series)
+        self.record(("rule", old, self.rule_state(rule)))
+
+    def begin_import(self, mode):
+        # En remplacement, les anciennes tâches sont gardées pour l'annulation,
+        # sauf si elles dépassent à elles seules la capacité de l'historique
+        previous = []
+        if mode == "replace":
+            previous = [task.copy() for task in itertools.islice(self.store.iter_tasks(), HISTORY_MAX_TASKS + 1)]
+        self.importing = (mode, previous, [])
+        self.store.begin_import(mode)
+
+    def import_batch(self, tasks):
+        self.store.import_batch(tasks)
+        mode, previous, imported = self.importing
+        if imported is None:
+            return
+        if len(previous) + len(imported) + len(tasks) > HISTORY_MAX_TASKS:
+            # Trop gros pour être annulé : inutile de garder la suite
+            self.importing = (mode, previous, None)
+        else:
+            imported.extend(tasks)
+
+    def end_import(self):
+        mode, previous, imported = self.importing
+        self.importing = None
+        self.store.end_import()
+        if imported is None or len(previous) > HISTORY_MAX_TASKS:
+            self.clear()  # rien à quoi revenir : les étapes précédentes ne s'appliquent plus
+            return
+        imported = [task.copy() for task in imported]  # identifiants attribués par end_import
+        if mode == "merge":
+            self.record(("tasks", [], imported))
+        else:
+            self.record(("all", previous, imported))
+
+    def abort_import(self):
+        self.importing = None
+        self.store.abort_import()
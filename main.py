@@ -1,19 +1,43 @@
 import customtkinter as ctk
 from tkcalendar import DateEntry
-from tkinter import messagebox, filedialog
+from tkinter import messagebox, filedialog, Canvas, Listbox
+import bisect
+import calendar
 from PIL import Image, ImageDraw, ImageFont
+import datetime
 import json
 import os
-import datetime
+import queue
+import time
 
-TASKS_FILE = "tasks.json"
+import perf
+from history import History
+from core import URGENCE_LEVELS, URGENCE_RANKS, STATUTS, RECURRENCES, Occurrence, Recurrence, Task, get_start_of_week
+from storage import EXPORT_FORMATS, IMPORT_QUEUE_DEPTH, ImportWorker, export_tasks_to, open_store
+
+SAVE_POLL_MS = 250  # Fréquence de remontée des erreurs d'écriture vers l'interface
+WATCH_POLL_MS = 1000  # Fréquence de fusion des modifications d'un autre processus (lues par le thread d'écriture)
+IMPORT_POLL_MS = 30
+SEARCH_DELAY_MS = 120  # Pause de frappe avant de lancer la recherche
+SEARCH_INDEX_STEP = 500  # Tâches indexées entre deux passages de la boucle Tk
+EMOJI_FONT = "seguiemj.ttf"
+# Polices essayées dans l'ordre ; NotoColorEmoji n'existe qu'en 109 px
+EMOJI_FONT_FALLBACKS = [EMOJI_FONT, "NotoColorEmoji.ttf", "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf", "Apple Color Emoji.ttc"]
+WEEK_PREFETCH = (-7, 7)  # Semaines voisines préparées pendant les temps morts (décalage en jours)
+DRAG_FRAME_MS = 16  # Le glisser est redessiné au plus une fois par image (~60 Hz)
+DRAG_THRESHOLD = 4  # Déplacement en pixels avant qu'un clic ne devienne un glisser
+ROW_HEIGHT = 36  # Hauteur d'une ligne de tâche (marges comprises), en pixels
+GLYPH_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "todotoday", "glyphs")
+GLYPH_FONTS_FILE = "polices.json"  # Dans GLYPH_CACHE_DIR : police trouvée pour chaque taille
+GLYPH_DEFAULT_FONT = "pil-defaut"  # Étiquette des rendus avec la police par défaut de PIL
+GLYPH_FONT_RECHECK = 7 * 86400  # Secondes avant de rechercher une police emoji installée depuis
 ALL_DAYS = ["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"]
-URGENCE_LEVELS = [
-    ("🟢", "Faible"),
-    ("🟡", "Moyen"),
-    ("🟠", "Élevé"),
-    ("🔥", "Critique")
-]
+ALL_MONTHS = ["Janvier", "Février", "Mars", "Avril", "Mai", "Juin", "Juillet", "Août",
+              "Septembre", "Octobre", "Novembre", "Décembre"]
+# Vue d'ensemble : couleur selon le nombre de tâches à faire du jour
+HEAT_STEPS = (1, 3, 6, 10)
+HEAT_COLORS = ["#ffffff", "#ffe0b2", "#ffb74d", "#fb8c00", "#e65100"]
+HEAT_DONE_COLOR = "#e8f5e9"  # Jour dont toutes les tâches sont faites
 URGENCE_COLORS = {
     "🟢": "#b6fcb6",
     "🟡": "#fff7b2",
@@ -21,25 +45,194 @@ URGENCE_COLORS = {
     "🔥": "#ffb2b2"
 }
 
-def load_tasks():
-    if not os.path.exists(TASKS_FILE):
-        return []
-    with open(TASKS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+_emoji_fonts = {}  # taille demandée -> (police, taille réelle, fichier trouvé ou None)
+_glyph_cache = {}  # (emoji, taille, étiquette de police, taille réelle) -> CTkImage
+_glyph_fonts = None  # contenu de GLYPH_FONTS_FILE, lu au premier emoji
 
-def save_tasks(tasks):
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
+def load_emoji_font(px):
+    if px not in _emoji_fonts:
+        for name in EMOJI_FONT_FALLBACKS:
+            for font_px in (px, 109):
+                try:
+                    _emoji_fonts[px] = (ImageFont.truetype(name, size=font_px), font_px, name)
+                    break
+                except OSError:
+                    pass
+            if px in _emoji_fonts:
+                break
+        else:
+            _emoji_fonts[px] = (ImageFont.load_default(), px, None)
+    return _emoji_fonts[px]
 
-def emoji_img(emoji, size=28):
+@perf.timed("render_emoji")
+def render_emoji(emoji, size, font, font_px):
+    canvas = max(size, int(font_px / 0.8))
+    img = Image.new("RGBA", (canvas, canvas), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.text((canvas//2, canvas//2), emoji, embedded_color=True, font=font, anchor="mm")
+    if canvas != size:
+        img = img.resize((size, size), Image.LANCZOS)
+    return img
+
+def font_tag(font_name):
+    return os.path.splitext(os.path.basename(font_name))[0] if font_name else GLYPH_DEFAULT_FONT
+
+def glyph_path(emoji, size, tag, font_px):
+    codepoints = "-".join(f"{ord(c):x}" for c in emoji)
+    return os.path.join(GLYPH_CACHE_DIR, f"{codepoints}_{size}_{tag}_{font_px}.png")
+
+def glyph_fonts():
+    global _glyph_fonts
+    if _glyph_fonts is None:
+        try:
+            with open(os.path.join(GLYPH_CACHE_DIR, GLYPH_FONTS_FILE), "r", encoding="utf-8") as f:
+                _glyph_fonts = json.load(f)
+        except (OSError, ValueError):
+            _glyph_fonts = {}
+    return _glyph_fonts
+
+def known_font(px):
+    # (étiquette, taille réelle) de la police trouvée pour px, sans la charger :
+    # en mémoire, sinon d'après un lancement précédent. None : à rechercher
+    if px in _emoji_fonts:
+        _, font_px, font_name = _emoji_fonts[px]
+        return font_tag(font_name), font_px
+    entry = glyph_fonts().get(str(px))
+    if not entry or entry["polices"] != EMOJI_FONT_FALLBACKS:
+        return None
+    if entry["police"] == GLYPH_DEFAULT_FONT and time.time() - entry["vue"] > GLYPH_FONT_RECHECK:
+        return None  # une police emoji a pu être installée depuis
+    return entry["police"], entry["taille"]
+
+def remember_font(px, tag, font_px):
+    fonts = glyph_fonts()
+    fonts[str(px)] = {"police": tag, "taille": font_px, "polices": EMOJI_FONT_FALLBACKS, "vue": time.time()}
+    with open(os.path.join(GLYPH_CACHE_DIR, GLYPH_FONTS_FILE), "w", encoding="utf-8") as f:
+        json.dump(fonts, f)
+
+def cached_glyph(path):
     try:
-        font = ImageFont.truetype("seguiemj.ttf", size=int(size*0.8))
+        with Image.open(path) as cached:
+            return cached.convert("RGBA")
     except OSError:
-        font = ImageFont.load_default()
-    img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-    draw.text((size//2, size//2), emoji, embedded_color=True, font=font, anchor="mm")
-    return ctk.CTkImage(img, size=(size, size))
+        return None
+
+@perf.timed("emoji_img")
+def emoji_img(emoji, size=28):
+    # Cache à deux niveaux : en mémoire pour le processus, en PNG sur disque
+    # pour les lancements suivants. Les PNG portent l'étiquette de la police
+    # réellement trouvée, notée dans GLYPH_FONTS_FILE : un lancement suivant
+    # n'essaie aucune police et ne dessine rien.
+    px = int(size*0.8)
+    known = known_font(px)
+    img = None
+    if known is not None:
+        key = (emoji, size, *known)
+        if key in _glyph_cache:
+            return _glyph_cache[key]
+        img = cached_glyph(glyph_path(*key))
+    if img is None:
+        font, font_px, font_name = load_emoji_font(px)
+        key = (emoji, size, font_tag(font_name), font_px)
+        if key in _glyph_cache:
+            return _glyph_cache[key]
+        img = cached_glyph(glyph_path(*key))
+        if img is None:
+            img = render_emoji(emoji, size, font, font_px)
+            try:
+                os.makedirs(GLYPH_CACHE_DIR, exist_ok=True)
+                img.save(glyph_path(*key))
+            except OSError:
+                pass  # Cache disque facultatif
+        if known != key[2:]:
+            try:
+                remember_font(px, *key[2:])
+            except OSError:
+                pass
+    _glyph_cache[key] = ctk.CTkImage(img, size=(size, size))
+    return _glyph_cache[key]
+
+def widget_count(widget):
+    # Widgets Tk réels (un widget customtkinter en contient plusieurs)
+    return 1 + sum(widget_count(child) for child in widget.winfo_children())
+
+class DayColumn(ctk.CTkFrame):
+    # Colonne d'un jour avec défilement virtuel : seules les lignes visibles
+    # existent, et ce petit ensemble de lignes est réaffecté aux tâches au fil
+    # du défilement. Le coût d'affichage ne dépend pas du nombre de tâches du jour.
+    def __init__(self, master, app, day, day_date, day_idx):
+        super().__init__(master)
+        self.app = app
+        self.day_date = day_date
+        self.day = day_date.toordinal()
+        self.day_idx = day_idx
+        self.tasks = []
+        self.offset = 0
+        self.rows = []
+        date_str = day_date.strftime("%Y-%m-%d")
+        self.header = ctk.CTkLabel(self, text=f"{day}\n{date_str}", font=("Arial", 14, "bold"))
+        self.header.pack(pady=5)
+        body = ctk.CTkFrame(self, fg_color="transparent")
+        body.pack(fill="both", expand=True)
+        self.scrollbar = ctk.CTkScrollbar(body, command=self.on_scrollbar)
+        self.viewport = ctk.CTkFrame(body, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda event: self.render())
+        for widget in (self, self.header, self.viewport):
+            self.bind_wheel(widget)
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda event: self.scroll(-1))
+        widget.bind("<Button-5>", lambda event: self.scroll(1))
+
+    def visible_count(self):
+        return max(1, self.viewport.winfo_height() // ROW_HEIGHT)
+
+    def set_tasks(self, tasks):
+        self.tasks = tasks
+        self.render()
+
+    def scroll(self, step):
+        self.offset += step
+        self.render()
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.offset = int(float(value) * len(self.tasks))
+        else:
+            self.offset += int(value) * (self.visible_count() if unit == "pages" else 1)
+        self.render()
+
+    @perf.timed("DayColumn.render")
+    def render(self):
+        count = len(self.tasks)
+        visible = self.visible_count()
+        self.offset = max(0, min(self.offset, count - visible))
+        while len(self.rows) < min(visible, count):
+            row = self.app.display_task(self)
+            row.shown = False
+            for widget in (row, *row.winfo_children()):
+                self.bind_wheel(widget)
+            self.rows.append(row)
+        # Les lignes affichées forment toujours un préfixe du pool : l'ordre de pack est conservé
+        for k, row in enumerate(self.rows):
+            i = self.offset + k
+            if k < visible and i < count:
+                self.app.update_task_row(row, self.tasks[i])
+                if not row.shown:
+                    row.pack(fill="x", pady=2, padx=2)
+                    row.shown = True
+            elif row.shown:
+                row.pack_forget()
+                row.shown = False
+                row.task = None
+        if count > visible:
+            self.scrollbar.set(self.offset / count, (self.offset + visible) / count)
+            if not self.scrollbar.winfo_ismapped():
+                self.scrollbar.pack(side="right", fill="y", before=self.viewport)
+        elif self.scrollbar.winfo_ismapped():
+            self.scrollbar.pack_forget()
 
 class TaskManagerApp(ctk.CTk):
     def __init__(self):
@@ -47,15 +240,78 @@ class TaskManagerApp(ctk.CTk):
         self.title("Gestionnaire de tâches hebdomadaire")
         self.geometry("1100x630")
         self.resizable(True, True)
-        self.tasks = load_tasks()
+        self.store = open_store()
+        self.history = History(self.store)  # les modifications de l'interface passent par l'historique
         self.show_weekend = ctk.BooleanVar(value=False)
         self.emoji_icons = {emoji: emoji_img(emoji, size=28) for emoji, _ in URGENCE_LEVELS}
         self.urgence_var = ctk.StringVar(value=URGENCE_LEVELS[0][0])
         self.week_start = self.get_start_of_week(datetime.date.today())
         self.dragged_task = None
+        self.drag_job = None
+        self.drag_pos = None
+        self.drag_ghost = None
+        self.drop_target = None
         self.frames = []
+        self.week_views = {}  # début de semaine -> vue construite (affichée ou en réserve)
+        self.prefetch_queue = []
+        self.prefetch_job = None
+        self.importer = None
+        self.edit_win = None
+        self.edit_target = None
+        self.search_results = []
+        self.search_job = None
+        self.search_build_job = None
+        self.search_waiting = False  # recherche à lancer quand l'index sera prêt
+        self.overview_win = None
+        self.overview_mode = ctk.StringVar(value="Mois")
+        self.overview_date = datetime.date.today().replace(day=1)
+        self.overview_cells = []
         self.create_widgets()
         self.update_weekend_view()  # Attention : NE PAS appeler self.refresh_tasks() séparément
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(SAVE_POLL_MS, self.check_save_errors)
+        self.after(WATCH_POLL_MS, self.check_external_changes)
+
+    def check_external_changes(self):
+        # Une autre fenêtre ou cli.py a modifié les tâches : seules les colonnes
+        # des jours touchés sont redessinées. Rien pendant un import ou un glisser.
+        if self.importer is None and self.dragged_task is None:
+            days = self.store.poll_changes()
+            if days:
+                self.history.clear()  # les étapes enregistrées peuvent ne plus s'appliquer
+                self.redraw_days(days)
+        self.after(WATCH_POLL_MS, self.check_external_changes)
+
+    def redraw_days(self, days):
+        for view in self.week_views.values():
+            for column in view.columns:
+                if column.day in days:
+                    column.set_tasks(self.store.day_tasks(column.day))
+        if self.overview_win is not None and self.overview_win.winfo_exists():
+            self.draw_overview()
+
+    def check_save_errors(self):
+        failed = False
+        errors = self.store.saver.errors
+        while not errors.empty():
+            exc = errors.get_nowait()
+            failed = True
+        if failed:
+            messagebox.showerror("Enregistrement", f"Impossible d'enregistrer les tâches :\n{exc}")
+            self.store.resync()
+        self.after(SAVE_POLL_MS, self.check_save_errors)
+
+    def on_close(self):
+        if self.importer is not None:
+            self.importer.cancelled = True
+            self.history.abort_import()
+        exc = self.store.flush()
+        if exc is not None:
+            if not messagebox.askyesno("Enregistrement", f"Impossible d'enregistrer les tâches :\n{exc}\n\nQuitter quand même ?"):
+                self.store.resync()
+                return
+        self.store.close()
+        self.destroy()
 
     def get_display_days(self):
         return ALL_DAYS if self.show_weekend.get() else ALL_DAYS[:5]
@@ -65,7 +321,7 @@ class TaskManagerApp(ctk.CTk):
                 for i in range(len(self.get_display_days()))]
 
     def get_start_of_week(self, any_date):
-        return any_date - datetime.timedelta(days=(any_date.weekday()))
+        return get_start_of_week(any_date)
 
     def create_widgets(self):
         # Première ligne : ajout/export/import
@@ -90,9 +346,15 @@ class TaskManagerApp(ctk.CTk):
             btn.pack(side="left", padx=2)
             self.urgence_buttons.append((btn, emoji))
         self.update_urgence_buttons()
-        ctk.CTkButton(self.menu_frame, text="Ajouter", command=self.add_task).pack(side="left", padx=8)
+        self.recurrence_var = ctk.StringVar(value="une fois")
+        ctk.CTkOptionMenu(self.menu_frame, variable=self.recurrence_var, values=["une fois"] + RECURRENCES,
+                          width=130, command=self.update_until_entry).pack(side="left", padx=3)
+        self.until_entry = ctk.CTkEntry(self.menu_frame, placeholder_text="Jusqu'au (facultatif)", width=140)
+        self.add_button = ctk.CTkButton(self.menu_frame, text="Ajouter", command=self.add_task)
+        self.add_button.pack(side="left", padx=8)
         ctk.CTkButton(self.menu_frame, text="📤 Export", command=self.export_tasks).pack(side="right", padx=3)
-        ctk.CTkButton(self.menu_frame, text="📥 Import", command=self.import_tasks).pack(side="right", padx=3)
+        self.import_button = ctk.CTkButton(self.menu_frame, text="📥 Import", command=self.import_tasks)
+        self.import_button.pack(side="right", padx=3)
 
         # Deuxième ligne : commandes semaine/week-end toujours accessibles
         self.command_frame = ctk.CTkFrame(self)
@@ -101,34 +363,101 @@ class TaskManagerApp(ctk.CTk):
         ctk.CTkButton(self.command_frame, text="Semaine suiv. ⟩", width=120, command=self.goto_next_week).pack(side="left", padx=4)
         ctk.CTkCheckBox(self.command_frame, text="Afficher le week-end", variable=self.show_weekend,
                         command=self.update_weekend_view).pack(side="left", padx=20)
+        ctk.CTkButton(self.command_frame, text="📅 Vue d'ensemble", width=140, command=self.show_overview).pack(side="left", padx=4)
+        self.search_entry = ctk.CTkEntry(self.command_frame, placeholder_text="Rechercher une tâche", width=260)
+        self.search_entry.pack(side="left", padx=4)
+        # L'index est construit dès l'entrée dans le champ, avant la première frappe
+        self.search_entry.bind("<FocusIn>", lambda event: self.start_search_index())
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
+        self.search_entry.bind("<Return>", lambda event: self.open_search_result(0))
+        self.search_entry.bind("<Down>", lambda event: self.focus_search_results())
+        self.search_entry.bind("<Escape>", lambda event: self.hide_search_results())
+        self.search_list = Listbox(self, height=12, activestyle="none", font=("Arial", 11))
+        self.search_list.bind("<ButtonRelease-1>", lambda event: self.open_search_result(self.search_list.nearest(event.y)))
+        self.search_list.bind("<Return>", lambda event: self.open_search_result(self.search_list.index("active")))
+        self.search_list.bind("<Escape>", lambda event: self.hide_search_results())
+        self.import_progress = ctk.CTkProgressBar(self.command_frame, width=200)
+        self.import_label = ctk.CTkLabel(self.command_frame, text="")
 
         # Grille principale (jours+tâches)
         self.grid_frame = ctk.CTkFrame(self)
         self.grid_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.grid_frame.grid_columnconfigure(0, weight=1)
+        self.grid_frame.grid_rowconfigure(0, weight=1)
+        self.bind("<Prior>", lambda event: self.goto_prev_week())
+        self.bind("<Next>", lambda event: self.goto_next_week())
+        self.bind("<F12>", lambda event: self.show_perf_stats())
+        self.bind("<Control-z>", lambda event: self.undo_redo(event))
+        self.bind("<Control-y>", lambda event: self.undo_redo(event, redo=True))
+        self.bind("<Control-Z>", lambda event: self.undo_redo(event, redo=True))
 
     def update_weekend_view(self):
-        for frame in self.frames:
-            frame.destroy()
-        self.frames.clear()
-        self.update_day_frames()
-        self.refresh_tasks()
+        # Le nombre de colonnes change : toutes les vues en réserve sont à refaire
+        for view in self.week_views.values():
+            self.destroy_view(view)
+        self.week_views.clear()
+        self.show_week()
 
-    def update_day_frames(self):
+    @perf.timed("build_week_view")
+    def build_week_view(self, week_start):
+        # Toutes les vues occupent la même cellule de la grille ; la semaine
+        # affichée est simplement placée au-dessus des autres
+        view = ctk.CTkFrame(self.grid_frame, fg_color="transparent")
+        view.grid(row=0, column=0, sticky="nsew")
+        view.lower()
         days = self.get_display_days()
-        num_days = len(days)
-        for i in range(num_days):
-            self.grid_frame.grid_columnconfigure(i, weight=1)
-        week_dates = self.get_week_dates()
+        for i in range(len(days)):
+            view.grid_columnconfigure(i, weight=1)
+        view.grid_rowconfigure(0, weight=1)
+        view.columns = []
         for i, day in enumerate(days):
-            frame = ctk.CTkFrame(self.grid_frame)
+            frame = DayColumn(view, self, day, week_start + datetime.timedelta(days=i), i)
             frame.grid(row=0, column=i, padx=3, pady=3, sticky="nsew")
-            date_str = week_dates[i].strftime("%Y-%m-%d")
-            label = ctk.CTkLabel(frame, text=f"{day}\n{date_str}", font=("Arial", 14, "bold"))
-            label.pack(pady=5)
-            frame.day_date = week_dates[i]
-            frame.day_idx = i
             frame.bind("<Enter>", self.on_enter_day)
-            self.frames.append(frame)
+            view.columns.append(frame)
+        self.week_views[week_start] = view
+        if perf.PERF_ENABLED:
+            perf.count("widgets_created", widget_count(view))
+        return view
+
+    def destroy_view(self, view):
+        if perf.PERF_ENABLED:
+            perf.count("widgets_destroyed", widget_count(view))
+        view.destroy()
+
+    @perf.timed("fill_week_view")
+    def fill_week_view(self, view):
+        self.store.load_range(view.columns[0].day_date.isoformat(), view.columns[-1].day_date.isoformat())
+        for frame in view.columns:
+            frame.set_tasks(self.store.day_tasks(frame.day))
+
+    @perf.timed("show_week")
+    def show_week(self):
+        view = self.week_views.get(self.week_start) or self.build_week_view(self.week_start)
+        view.lift()
+        self.frames = view.columns
+        # On ne garde que la semaine affichée et ses voisines
+        keep = {self.week_start + datetime.timedelta(days=d) for d in (0, *WEEK_PREFETCH)}
+        for week_start in list(self.week_views):
+            if week_start not in keep:
+                self.destroy_view(self.week_views.pop(week_start))
+        self.refresh_tasks()
+
+    def schedule_prefetch(self):
+        self.prefetch_queue = [self.week_start + datetime.timedelta(days=d) for d in WEEK_PREFETCH]
+        if self.prefetch_job is None:
+            self.prefetch_job = self.after_idle(self.prefetch_next_week)
+
+    def prefetch_next_week(self):
+        # Une semaine par passage dans la boucle Tk, pour ne pas retarder les événements
+        self.prefetch_job = None
+        if not self.prefetch_queue:
+            return
+        week_start = self.prefetch_queue.pop(0)
+        view = self.week_views.get(week_start) or self.build_week_view(week_start)
+        self.fill_week_view(view)
+        if self.prefetch_queue:
+            self.prefetch_job = self.after_idle(self.prefetch_next_week)
 
     def select_urgence(self, emoji):
         self.urgence_var.set(emoji)
@@ -142,175 +471,591 @@ class TaskManagerApp(ctk.CTk):
             else:
                 btn.configure(fg_color="#e0e0e0", border_width=0)
 
+    def update_until_entry(self, recurrence):
+        # La date de fin n'a de sens que pour une tâche répétée
+        if recurrence == "une fois":
+            self.until_entry.pack_forget()
+        elif not self.until_entry.winfo_ismapped():
+            self.until_entry.pack(side="left", padx=3, before=self.add_button)
+
     def add_task(self):
         titre = self.title_entry.get().strip()
         desc = self.desc_entry.get().strip()
-        date = self.date_entry.get_date().strftime('%Y-%m-%d')
+        date = self.date_entry.get_date()
         urgence = self.urgence_var.get()
         if not (titre and date and urgence):
             messagebox.showwarning("Champs manquants", "Veuillez remplir tous les champs obligatoires.")
             return
-        task = {
-            "titre": titre,
-            "description": desc,
-            "date": date,
-            "urgence": urgence,
-            "statut": "à faire"
-        }
-        self.tasks.append(task)
-        save_tasks(self.tasks)
+        recurrence = self.recurrence_var.get()
+        if recurrence == "une fois":
+            self.history.add(Task(titre, desc, date.toordinal(), URGENCE_RANKS[urgence]))
+        else:
+            until = self.until_entry.get().strip()
+            try:
+                until = datetime.date.fromisoformat(until).toordinal() if until else None
+            except ValueError:
+                messagebox.showwarning("Date de fin", "Date de fin invalide (AAAA-MM-JJ attendu).")
+                return
+            self.history.add_recurrence(Recurrence(None, titre, desc, URGENCE_RANKS[urgence], recurrence,
+                                                 date.toordinal(), until))
+            self.until_entry.delete(0, "end")
         self.title_entry.delete(0, "end")
         self.desc_entry.delete(0, "end")
         self.urgence_var.set(URGENCE_LEVELS[0][0])
         self.update_urgence_buttons()
         self.refresh_tasks()
 
+    @perf.timed("refresh_tasks")
     def refresh_tasks(self):
-        for frame in self.frames:
-            widgets = list(frame.winfo_children())
-            for widget in widgets[1:]:
-                widget.destroy()
-        week_dates = self.get_week_dates()
-        for i, day_date in enumerate(week_dates):
-            day_str = day_date.strftime("%Y-%m-%d")
-            day_tasks = [t for t in self.tasks if t["date"] == day_str]
-            for task in day_tasks:
-                self.display_task(self.frames[i], task)
-
-    def display_task(self, frame, task):
-        urgence = task["urgence"]
-        bg_color = URGENCE_COLORS.get(urgence, "#f0f0f0")
-        task_frame = ctk.CTkFrame(frame, fg_color=bg_color)
-        task_frame.pack(fill="x", pady=2, padx=2)
-        icon = self.emoji_icons.get(urgence)
-        ctk.CTkLabel(task_frame, text="", image=icon, width=30).pack(side="left")
-        ctk.CTkLabel(task_frame, text=task["titre"], font=("Arial", 12, "bold")).pack(side="left", padx=2)
-        ctk.CTkLabel(task_frame, text=f"[{task['statut']}]", font=("Arial", 10)).pack(side="left", padx=2)
-        ctk.CTkButton(task_frame, text="✏️", width=24, command=lambda t=task: self.edit_task(t)).pack(side="right", padx=1)
-        ctk.CTkButton(task_frame, text="🗑️", width=24, command=lambda t=task: self.delete_task(t)).pack(side="right", padx=1)
-        # Drag and drop
-        task_frame.bind("<ButtonPress-1>", lambda event, tf=task_frame, t=task: self.start_drag(event, tf, t, frame.day_idx))
-        task_frame.bind("<B1-Motion>", self.do_drag)
-        task_frame.bind("<ButtonRelease-1>", lambda event, t=task: self.end_drag(event, t))
+        # Chaque colonne ne réaffecte que ses lignes visibles ; une ligne dont
+        # la tâche n'a pas changé n'est pas touchée
+        self.fill_week_view(self.week_views[self.week_start])
+        # Les semaines voisines sont remises à jour pendant les temps morts
+        self.schedule_prefetch()
+        if self.overview_win is not None and self.overview_win.winfo_exists():
+            self.draw_overview()
+
+    def task_row_state(self, task):
+        titre = f"↻ {task.titre}" if isinstance(task, Occurrence) else task.titre
+        return (titre, task.urgence, task.statut)
+
+    def display_task(self, frame):
+        # Ligne du pool d'une colonne ; la tâche affichée est fixée par update_task_row
+        task_frame = ctk.CTkFrame(frame.viewport, fg_color="#f0f0f0")
+        task_frame.icon_label = ctk.CTkLabel(task_frame, text="", width=30)
+        task_frame.icon_label.pack(side="left")
+        task_frame.title_label = ctk.CTkLabel(task_frame, text="", font=("Arial", 12, "bold"))
+        task_frame.title_label.pack(side="left", padx=2)
+        task_frame.statut_label = ctk.CTkLabel(task_frame, text="", font=("Arial", 10))
+        task_frame.statut_label.pack(side="left", padx=2)
+        ctk.CTkButton(task_frame, text="✏️", width=24, command=lambda: self.edit_task(task_frame.task)).pack(side="right", padx=1)
+        ctk.CTkButton(task_frame, text="🗑️", width=24, command=lambda: self.delete_task(task_frame.task)).pack(side="right", padx=1)
+        task_frame.task = None
+        task_frame.row_state = (None, None, None)
+        # Drag and drop, depuis le fond de la ligne comme depuis ses libellés
+        for widget in (task_frame, task_frame.icon_label, task_frame.title_label, task_frame.statut_label):
+            widget.bind("<ButtonPress-1>", lambda event: self.start_drag(event, task_frame, task_frame.task, frame.day_idx))
+            widget.bind("<B1-Motion>", self.do_drag)
+            widget.bind("<ButtonRelease-1>", lambda event: self.end_drag(event, task_frame.task))
+        if perf.PERF_ENABLED:
+            perf.count("widgets_created", widget_count(task_frame))
+        return task_frame
+
+    @perf.timed("update_task_row")
+    def update_task_row(self, row, task):
+        row.task = task
+        state = self.task_row_state(task)
+        if state == row.row_state:
+            return
+        titre, urgence, statut = state
+        if urgence != row.row_state[1]:
+            emoji = URGENCE_LEVELS[urgence][0]
+            row.configure(fg_color=URGENCE_COLORS.get(emoji, "#f0f0f0"))
+            row.icon_label.configure(image=self.emoji_icons.get(emoji))
+        if titre != row.row_state[0]:
+            row.title_label.configure(text=titre)
+        if statut != row.row_state[2]:
+            row.statut_label.configure(text=f"[{STATUTS[statut]}]")
+        row.row_state = state
 
     def start_drag(self, event, widget, task, orig_col_idx):
-        self.dragged_task = {"task": task, "widget": widget, "orig_col_idx": orig_col_idx}
-        widget.start_y = event.y_root
+        if task is None:
+            return
+        self.dragged_task = {"task": task, "widget": widget, "orig_col_idx": orig_col_idx,
+                             "origin": (event.x_root, event.y_root), "moved": False}
 
     def do_drag(self, event):
-        pass  # Ajouter feedback visuel au besoin
-
-    def end_drag(self, event, task):
+        # Les mouvements sont seulement notés ; l'affichage suit au plus une fois par image
         if not self.dragged_task:
             return
-        x_win = self.grid_frame.winfo_rootx()
+        self.drag_pos = (event.x_root, event.y_root)
+        if self.drag_job is None:
+            self.drag_job = self.after(DRAG_FRAME_MS, self.update_drag)
+
+    def update_drag(self):
+        self.drag_job = None
+        drag = self.dragged_task
+        if not drag:
+            return
+        x_root, y_root = self.drag_pos
+        if not drag["moved"]:
+            x0, y0 = drag["origin"]
+            if abs(x_root - x0) + abs(y_root - y0) < DRAG_THRESHOLD:
+                return
+            drag["moved"] = True
+            self.show_drag_ghost(drag["task"])
+        self.drag_ghost.place(x=x_root - self.winfo_rootx() + 12, y=y_root - self.winfo_rooty() + 8)
+        self.drag_ghost.lift()
+        self.set_drop_target(self.column_at(x_root))
+
+    def show_drag_ghost(self, task):
+        # Étiquette unique, réutilisée d'un glisser à l'autre
+        if self.drag_ghost is None:
+            self.drag_ghost = ctk.CTkLabel(self, text="", corner_radius=6, font=("Arial", 12, "bold"))
+        self.drag_ghost.configure(text=f" {task['urgence']} {task.titre} ",
+                                  fg_color=URGENCE_COLORS.get(task["urgence"], "#f0f0f0"))
+
+    def set_drop_target(self, col_idx):
+        target = self.frames[col_idx] if col_idx is not None else None
+        if target is self.drop_target:
+            return
+        if self.drop_target is not None and self.drop_target.winfo_exists():
+            self.drop_target.configure(border_width=0)
+        if target is not None:
+            target.configure(border_width=2, border_color="#333333")
+        self.drop_target = target
+
+    def column_at(self, x_root):
         col_w = self.grid_frame.winfo_width() // len(self.frames)
-        x_rel = event.x_root - x_win
-        col_idx = int(x_rel // col_w)
-        if 0 <= col_idx < len(self.frames):
-            new_date = self.frames[col_idx].day_date.strftime('%Y-%m-%d')
-            if task["date"] != new_date:
-                task["date"] = new_date
-                save_tasks(self.tasks)
-                self.refresh_tasks()
+        if col_w <= 0:
+            return None
+        col_idx = (x_root - self.grid_frame.winfo_rootx()) // col_w
+        return col_idx if 0 <= col_idx < len(self.frames) else None
+
+    def end_drag(self, event, task):
+        drag = self.dragged_task
+        if not drag:
+            return
         self.dragged_task = None
+        if self.drag_job is not None:
+            self.after_cancel(self.drag_job)
+            self.drag_job = None
+        if self.drag_ghost is not None:
+            self.drag_ghost.place_forget()
+        self.set_drop_target(None)
+        col_idx = self.column_at(event.x_root)
+        # La ligne a pu être réaffectée pendant le glisser : on garde la tâche saisie
+        task = drag["task"]
+        if not drag["moved"] or col_idx is None or task.day == self.frames[col_idx].day:
+            return
+        source, target = self.frames[drag["orig_col_idx"]], self.frames[col_idx]
+        before = task.copy()
+        task.day = target.day
+        # Une seule entrée de journal (ou un seul UPDATE) pour cette tâche
+        self.history.update(task, before)
+        if isinstance(task, Occurrence):
+            self.refresh_tasks()  # les occurrences de la semaine sont recalculées
+            return
+        # Seules les deux colonnes concernées sont réaffichées
+        for column in (source, target):
+            column.set_tasks(self.store.day_tasks(column.day))
+        if self.overview_win is not None and self.overview_win.winfo_exists():
+            self.draw_overview()
 
     def on_enter_day(self, event):
         pass  # Optionnel pour survol
 
-    def edit_task(self, task):
+    def build_edit_dialog(self):
+        # Construit une seule fois : les ouvertures suivantes ne font que remplir les champs
         edit_win = ctk.CTkToplevel(self)
         edit_win.title("Modifier la tâche")
         edit_win.geometry("400x330")
         edit_win.transient(self)
-        edit_win.grab_set()
-        edit_win.focus_force()
+        edit_win.protocol("WM_DELETE_WINDOW", self.close_edit_dialog)
         form_frame = ctk.CTkFrame(edit_win)
         form_frame.pack(fill="both", expand=True, padx=20, pady=20)
-        titre_entry = ctk.CTkEntry(form_frame, placeholder_text="Titre", width=300)
-        titre_entry.insert(0, task["titre"])
-        titre_entry.pack(pady=8)
-        desc_entry = ctk.CTkEntry(form_frame, placeholder_text="Description", width=300)
-        desc_entry.insert(0, task["description"])
-        desc_entry.pack(pady=8)
+        self.edit_titre_entry = ctk.CTkEntry(form_frame, placeholder_text="Titre", width=300)
+        self.edit_titre_entry.pack(pady=8)
+        self.edit_desc_entry = ctk.CTkEntry(form_frame, placeholder_text="Description", width=300)
+        self.edit_desc_entry.pack(pady=8)
         date_frame = ctk.CTkFrame(form_frame, fg_color="transparent")
         date_frame.pack(pady=8)
-        date_entry = DateEntry(date_frame, date_pattern="yyyy-mm-dd", locale='fr_FR')
-        try:
-            date_entry.set_date(datetime.datetime.strptime(task["date"], "%Y-%m-%d"))
-        except Exception:
-            pass
-        date_entry.pack()
-        urgence_var = ctk.StringVar(value=task["urgence"])
-        emoji_icons = {emoji: emoji_img(emoji, size=28) for emoji, _ in URGENCE_LEVELS}
+        self.edit_date_entry = DateEntry(date_frame, date_pattern="yyyy-mm-dd", locale='fr_FR')
+        self.edit_date_entry.pack()
+        self.edit_urgence_var = ctk.StringVar(value=URGENCE_LEVELS[0][0])
         urgence_frame = ctk.CTkFrame(form_frame, fg_color="transparent")
         urgence_frame.pack(pady=8)
-        urgence_buttons = []
-        def select_edit_urgence(e):
-            urgence_var.set(e)
-            update_edit_urgence_buttons()
-        def update_edit_urgence_buttons():
-            selected = urgence_var.get()
-            for btn, emoji in urgence_buttons:
-                if emoji == selected:
-                    btn.configure(fg_color="#cccccc", border_width=2, border_color="#333333")
-                else:
-                    btn.configure(fg_color="#e0e0e0", border_width=0)
+        self.edit_urgence_buttons = []
         for emoji, label in URGENCE_LEVELS:
-            icon = emoji_icons[emoji]
+            icon = self.emoji_icons[emoji]
             btn = ctk.CTkButton(
                 urgence_frame, text="", image=icon, width=36,
                 fg_color="#e0e0e0",
-                command=lambda e=emoji: select_edit_urgence(e)
+                command=lambda e=emoji: self.select_edit_urgence(e)
             )
             btn.pack(side="left", padx=2)
-            urgence_buttons.append((btn, emoji))
-        update_edit_urgence_buttons()
-        statut_var = ctk.StringVar(value=task["statut"])
-        ctk.CTkOptionMenu(form_frame, variable=statut_var, values=["à faire", "fait"]).pack(pady=8)
-        ctk.CTkButton(form_frame, text="Enregistrer", command=lambda: self.save_edit(
-            task, titre_entry, desc_entry, date_entry, urgence_var, statut_var, edit_win
-        )).pack(pady=12)
+            self.edit_urgence_buttons.append((btn, emoji))
+        self.edit_statut_var = ctk.StringVar(value=STATUTS[0])
+        ctk.CTkOptionMenu(form_frame, variable=self.edit_statut_var, values=STATUTS).pack(pady=8)
+        ctk.CTkButton(form_frame, text="Enregistrer", command=self.save_edit).pack(pady=12)
+        edit_win.withdraw()
+        self.edit_win = edit_win
+
+    def select_edit_urgence(self, emoji):
+        self.edit_urgence_var.set(emoji)
+        self.update_edit_urgence_buttons()
+
+    def update_edit_urgence_buttons(self):
+        selected = self.edit_urgence_var.get()
+        for btn, emoji in self.edit_urgence_buttons:
+            if emoji == selected:
+                btn.configure(fg_color="#cccccc", border_width=2, border_color="#333333")
+            else:
+                btn.configure(fg_color="#e0e0e0", border_width=0)
+
+    def edit_task(self, task):
+        if self.edit_win is None or not self.edit_win.winfo_exists():
+            self.build_edit_dialog()
+        self.edit_target = task
+        self.edit_titre_entry.delete(0, "end")
+        self.edit_titre_entry.insert(0, task["titre"])
+        self.edit_desc_entry.delete(0, "end")
+        self.edit_desc_entry.insert(0, task["description"])
+        self.edit_date_entry.set_date(datetime.date.fromordinal(task.day))
+        self.select_edit_urgence(task["urgence"])
+        self.edit_statut_var.set(task["statut"])
+        self.edit_win.deiconify()
+        self.edit_win.lift()
+        self.edit_win.grab_set()
+        self.edit_win.focus_force()
+
+    def close_edit_dialog(self):
+        self.edit_win.grab_release()
+        self.edit_win.withdraw()
+        self.edit_target = None
 
-    def save_edit(self, task, titre_entry, desc_entry, date_entry, urgence_var, statut_var, edit_win):
-        task["titre"] = titre_entry.get().strip()
-        task["description"] = desc_entry.get().strip()
-        task["date"] = date_entry.get_date().strftime('%Y-%m-%d')
-        task["urgence"] = urgence_var.get()
-        task["statut"] = statut_var.get()
-        save_tasks(self.tasks)
+    def save_edit(self):
+        task = self.edit_target
+        before = task.copy()
+        task.titre = self.edit_titre_entry.get().strip()
+        task.description = self.edit_desc_entry.get().strip()
+        task.day = self.edit_date_entry.get_date().toordinal()
+        task["urgence"] = self.edit_urgence_var.get()
+        task["statut"] = self.edit_statut_var.get()
+        self.history.update(task, before)
         self.refresh_tasks()
-        edit_win.destroy()
+        self.close_edit_dialog()
 
     def delete_task(self, task):
+        if isinstance(task, Occurrence):
+            series = messagebox.askyesnocancel(
+                "Suppression", "Cette tâche se répète. Supprimer toute la série ?\n\n"
+                "Oui : toute la série\nNon : seulement ce jour")
+            if series is not None:
+                self.history.delete_occurrence(task, series)
+                self.refresh_tasks()
+            return
         if messagebox.askyesno("Suppression", "Supprimer cette tâche ?"):
-            self.tasks.remove(task)
-            save_tasks(self.tasks)
+            self.history.delete(task)
             self.refresh_tasks()
 
+    def undo_redo(self, event, redo=False):
+        # Ctrl+Z dans un champ de saisie (DateEntry compris : un ttk.Entry) reste
+        # au champ ; rien pendant un import
+        if self.importer is not None or event.widget.winfo_class() in ("Entry", "TEntry", "Text"):
+            return None
+        if (self.history.redo if redo else self.history.undo)():
+            self.refresh_tasks()
+        else:
+            self.bell()
+        return "break"
+
+    def show_perf_stats(self):
+        # F12 : résumé des mesures, à copier dans un rapport de bug
+        if not perf.PERF_ENABLED:
+            messagebox.showinfo("Mesures", "Relancer avec TODOTODAY_PERF=1 pour activer les mesures.")
+            return
+        stats_win = ctk.CTkToplevel(self)
+        stats_win.title("Mesures")
+        stats_win.geometry("640x420")
+        stats_win.transient(self)
+        text = ctk.CTkTextbox(stats_win, font=("Courier", 12), wrap="none")
+        text.pack(fill="both", expand=True, padx=10, pady=(10, 0))
+        text.insert("1.0", perf.summary())
+        text.configure(state="disabled")
+        button_frame = ctk.CTkFrame(stats_win, fg_color="transparent")
+        button_frame.pack(pady=8)
+        def copy():
+            self.clipboard_clear()
+            self.clipboard_append(perf.summary())
+        def save():
+            messagebox.showinfo("Mesures", f"Résumé ajouté à {os.path.abspath(perf.write_report())}", parent=stats_win)
+        ctk.CTkButton(button_frame, text="Copier", command=copy).pack(side="left", padx=4)
+        ctk.CTkButton(button_frame, text="Enregistrer", command=save).pack(side="left", padx=4)
+        ctk.CTkButton(button_frame, text="Remettre à zéro", command=lambda: (perf.reset(), stats_win.destroy())).pack(side="left", padx=4)
+
     def export_tasks(self):
-        fp = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
-        if fp:
-            with open(fp, "w", encoding="utf-8") as f:
-                json.dump(self.tasks, f, ensure_ascii=False, indent=2)
+        export_win = ctk.CTkToplevel(self)
+        export_win.title("Exporter les tâches")
+        export_win.geometry("320x300")
+        export_win.transient(self)
+        export_win.grab_set()
+        form_frame = ctk.CTkFrame(export_win)
+        form_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        format_var = ctk.StringVar(value="JSON")
+        ctk.CTkOptionMenu(form_frame, variable=format_var, values=list(EXPORT_FORMATS)).pack(pady=6)
+        first_entry = ctk.CTkEntry(form_frame, placeholder_text="Du (AAAA-MM-JJ, optionnel)", width=220)
+        first_entry.pack(pady=6)
+        last_entry = ctk.CTkEntry(form_frame, placeholder_text="Au (AAAA-MM-JJ, optionnel)", width=220)
+        last_entry.pack(pady=6)
+        statut_var = ctk.StringVar(value="tous")
+        ctk.CTkOptionMenu(form_frame, variable=statut_var, values=["tous"] + STATUTS).pack(pady=6)
+        ctk.CTkButton(form_frame, text="Exporter", command=lambda: self.run_export(
+            export_win, format_var.get(), first_entry.get().strip(), last_entry.get().strip(), statut_var.get()
+        )).pack(pady=12)
+
+    def run_export(self, export_win, fmt, first, last, statut):
+        try:
+            for value in (first, last):
+                if value:
+                    datetime.date.fromisoformat(value)
+        except ValueError:
+            messagebox.showwarning("Export", "Les dates doivent être au format AAAA-MM-JJ.", parent=export_win)
+            return
+        ext = EXPORT_FORMATS[fmt]
+        fp = filedialog.asksaveasfilename(parent=export_win, defaultextension=ext, filetypes=[(f"{fmt} files", f"*{ext}")])
+        if not fp:
+            return
+        tasks = self.store.iter_tasks(first or None, last or None, None if statut == "tous" else statut)
+        count = export_tasks_to(fp, fmt, tasks)
+        export_win.destroy()
+        messagebox.showinfo("Export", f"{count} tâches exportées.")
 
     def import_tasks(self):
         fp = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
-        if fp:
-            with open(fp, "r", encoding="utf-8") as f:
-                self.tasks = json.load(f)
-            save_tasks(self.tasks)
+        if not fp:
+            return
+        replace = messagebox.askyesnocancel(
+            "Import", "Remplacer toutes les tâches existantes ?\n\nOui : remplacer\nNon : ajouter aux tâches existantes")
+        if replace is None:
+            return
+        self.history.begin_import("replace" if replace else "merge")
+        self.importer = ImportWorker(fp)
+        self.imported_count = 0
+        self.import_button.configure(state="disabled")
+        self.import_progress.set(0)
+        self.import_progress.pack(side="right", padx=6)
+        self.import_label.pack(side="right", padx=4)
+        self.after(IMPORT_POLL_MS, self.poll_import)
+
+    def poll_import(self):
+        # Quelques lots par tour de boucle Tk : la fenêtre reste réactive
+        for _ in range(IMPORT_QUEUE_DEPTH):
+            try:
+                kind, payload, progress = self.importer.batches.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "batch":
+                self.history.import_batch(payload)
+                self.imported_count += len(payload)
+                self.import_progress.set(progress)
+                self.import_label.configure(text=f"{self.imported_count} tâches importées")
+                continue
+            if kind == "done":
+                self.history.end_import()
+            else:
+                self.history.abort_import()
+                messagebox.showerror("Import", f"Import interrompu :\n{payload}")
+            self.importer = None
+            self.import_button.configure(state="normal")
+            self.import_progress.pack_forget()
+            self.import_label.pack_forget()
             self.refresh_tasks()
+            return
+        self.after(IMPORT_POLL_MS, self.poll_import)
+
+    def on_search_key(self, event):
+        if event.keysym in ("Return", "Escape", "Up", "Down"):
+            return
+        # Une frappe rapide ne lance qu'une seule recherche
+        if self.search_job is not None:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DELAY_MS, self.run_search)
+
+    def start_search_index(self):
+        if self.search_build_job is None:
+            self.search_build_job = self.after_idle(self.build_search_index)
+
+    @perf.timed("build_search_index")
+    def build_search_index(self):
+        # L'index est construit par pas, entre lesquels Tk traite ses événements
+        self.search_build_job = None
+        if not self.store.prepare_search(SEARCH_INDEX_STEP):
+            self.search_build_job = self.after(1, self.build_search_index)
+        elif self.search_waiting:
+            self.search_waiting = False
+            self.run_search()
+
+    @perf.timed("run_search")
+    def run_search(self):
+        self.search_job = None
+        query = self.search_entry.get().strip()
+        if not query:
+            self.search_results = []
+            self.hide_search_results()
+            return
+        if not self.store.prepare_search(SEARCH_INDEX_STEP):
+            # Relancée par build_search_index une fois l'index prêt
+            self.search_waiting = True
+            self.start_search_index()
+            return
+        self.search_results = self.store.search(query)
+        self.search_list.delete(0, "end")
+        if self.search_results:
+            # Libellé plutôt qu'emoji : la Listbox Tk ne sait pas tous les afficher
+            self.search_list.insert("end", *(f"{task['date']}  {URGENCE_LEVELS[task.urgence][1]:<9} {task.titre}"
+                                             for task in self.search_results))
+        else:
+            self.search_list.insert("end", "Aucune tâche trouvée")
+        self.search_list.place(in_=self.search_entry, x=0, rely=1.0, y=2, width=440)
+        self.search_list.lift()
+
+    def hide_search_results(self):
+        self.search_list.place_forget()
+
+    def focus_search_results(self):
+        if self.search_results and self.search_list.winfo_ismapped():
+            self.search_list.focus_set()
+            self.search_list.selection_set(0)
+            self.search_list.activate(0)
+
+    def open_search_result(self, index):
+        # Affiche la semaine de la tâche et fait défiler sa colonne jusqu'à elle
+        if not 0 <= index < len(self.search_results):
+            return
+        task = self.search_results[index]
+        self.hide_search_results()
+        column = self.goto_day(task.day)
+        for i, t in enumerate(column.tasks):
+            # Les stockages SQLite et « mois » renvoient des copies, de même identifiant
+            if t.id == task.id:
+                column.offset = i
+                column.render()
+                row = column.rows[i - column.offset]
+                row.configure(border_width=2, border_color="#333333")
+                self.after(1500, lambda: row.configure(border_width=0))
+                break
+
+    def goto_day(self, day):
+        # Affiche la semaine d'un jour (ordinal), week-end compris si besoin ; renvoie sa colonne
+        date = datetime.date.fromordinal(day)
+        self.week_start = self.get_start_of_week(date)
+        if date.weekday() >= 5 and not self.show_weekend.get():
+            self.show_weekend.set(True)
+            self.update_weekend_view()
+        else:
+            self.show_week()
+        return self.frames[date.weekday()]
+
+    def show_overview(self):
+        if self.overview_win is not None and self.overview_win.winfo_exists():
+            self.overview_win.lift()
+            return
+        win = ctk.CTkToplevel(self)
+        win.title("Vue d'ensemble")
+        win.geometry("780x520")
+        win.transient(self)
+        bar = ctk.CTkFrame(win, fg_color="transparent")
+        bar.pack(fill="x", padx=10, pady=6)
+        ctk.CTkButton(bar, text="⟨", width=40, command=lambda: self.move_overview(-1)).pack(side="left", padx=2)
+        self.overview_label = ctk.CTkLabel(bar, text="", width=180, font=("Arial", 14, "bold"))
+        self.overview_label.pack(side="left", padx=4)
+        ctk.CTkButton(bar, text="⟩", width=40, command=lambda: self.move_overview(1)).pack(side="left", padx=2)
+        ctk.CTkSegmentedButton(bar, values=["Mois", "Année"], variable=self.overview_mode,
+                               command=lambda mode: self.draw_overview()).pack(side="right")
+        self.overview_canvas = Canvas(win, bg="white", highlightthickness=0)
+        self.overview_canvas.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.overview_canvas.bind("<Configure>", lambda event: self.draw_overview())
+        self.overview_canvas.bind("<Button-1>", self.on_overview_click)
+        self.overview_win = win
+
+    def move_overview(self, step):
+        date = self.overview_date
+        if self.overview_mode.get() == "Mois":
+            month = date.year * 12 + date.month - 1 + step
+            self.overview_date = datetime.date(month // 12, month % 12 + 1, 1)
+        else:
+            self.overview_date = date.replace(year=date.year + step)
+        self.draw_overview()
+
+    def heat_color(self, counts):
+        # counts : compteurs du jour (voir core.count_slot), les tâches à faire d'abord
+        if counts is None:
+            return HEAT_COLORS[0]
+        todo = sum(counts[:len(URGENCE_LEVELS)])
+        if not todo:
+            return HEAT_DONE_COLOR if sum(counts) else HEAT_COLORS[0]
+        return HEAT_COLORS[bisect.bisect_right(HEAT_STEPS, todo)]
+
+    @perf.timed("draw_overview")
+    def draw_overview(self):
+        canvas = self.overview_canvas
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if width <= 1:
+            return  # pas encore affiché
+        canvas.delete("all")
+        self.overview_cells = []
+        if self.overview_mode.get() == "Mois":
+            self.draw_overview_month(canvas, width, height)
+        else:
+            self.draw_overview_year(canvas, width, height)
+
+    def draw_overview_month(self, canvas, width, height):
+        first = self.overview_date
+        last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+        self.overview_label.configure(text=f"{ALL_MONTHS[first.month - 1]} {first.year}")
+        counts = self.store.overview_counts(first.isoformat(), last.isoformat())
+        cell_w, cell_h = width / 7, (height - 24) / 6
+        for i, name in enumerate(ALL_DAYS):
+            canvas.create_text(i * cell_w + cell_w / 2, 12, text=name[:3], font=("Arial", 10, "bold"))
+        for n in range(last.day):
+            day = first.toordinal() + n
+            row, col = divmod(n + first.weekday(), 7)
+            x0, y0 = col * cell_w, 24 + row * cell_h
+            day_counts = counts.get(day)
+            canvas.create_rectangle(x0 + 1, y0 + 1, x0 + cell_w - 1, y0 + cell_h - 1,
+                                    fill=self.heat_color(day_counts), outline="#cccccc")
+            canvas.create_text(x0 + 6, y0 + 4, text=str(n + 1), anchor="nw", font=("Arial", 10, "bold"))
+            if day_counts:
+                todo = day_counts[:len(URGENCE_LEVELS)]
+                done = sum(day_counts[len(URGENCE_LEVELS):])
+                canvas.create_text(x0 + 6, y0 + cell_h - 4, anchor="sw", font=("Arial", 9),
+                                   text=f"{sum(todo)} à faire\n{done} fait{'s' if done > 1 else ''}")
+                # Bandeau de l'urgence la plus haute parmi les tâches à faire
+                top = max((rank for rank, count in enumerate(todo) if count), default=None)
+                if top is not None:
+                    canvas.create_rectangle(x0 + cell_w - 9, y0 + 4, x0 + cell_w - 4, y0 + cell_h - 4,
+                                            fill=URGENCE_COLORS[URGENCE_LEVELS[top][0]], outline="")
+            self.overview_cells.append((x0, y0, x0 + cell_w, y0 + cell_h, day))
+
+    def draw_overview_year(self, canvas, width, height):
+        year = self.overview_date.year
+        first, last = datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+        self.overview_label.configure(text=str(year))
+        counts = self.store.overview_counts(first.isoformat(), last.isoformat())
+        # Une colonne par semaine, une ligne par jour de la semaine
+        origin = self.get_start_of_week(first).toordinal()
+        weeks = (last.toordinal() - origin) // 7 + 1
+        size = min((width - 40) / weeks, (height - 30) / 7)
+        for i, name in enumerate(ALL_DAYS):
+            canvas.create_text(34, 30 + i * size + size / 2, text=name[:3], anchor="e", font=("Arial", 9))
+        for day in range(first.toordinal(), last.toordinal() + 1):
+            col, row = divmod(day - origin, 7)
+            x0, y0 = 40 + col * size, 30 + row * size
+            date = datetime.date.fromordinal(day)
+            if date.day == 1:
+                canvas.create_text(x0, 14, text=ALL_MONTHS[date.month - 1][:4], anchor="w", font=("Arial", 9))
+            canvas.create_rectangle(x0 + 1, y0 + 1, x0 + size - 1, y0 + size - 1,
+                                    fill=self.heat_color(counts.get(day)), outline="#dddddd")
+            self.overview_cells.append((x0, y0, x0 + size, y0 + size, day))
+
+    def on_overview_click(self, event):
+        for x0, y0, x1, y1, day in self.overview_cells:
+            if x0 <= event.x < x1 and y0 <= event.y < y1:
+                self.goto_day(day)
+                self.lift()
+                return
 
     def goto_prev_week(self):
         self.week_start -= datetime.timedelta(days=7)
-        self.update_weekend_view()
+        self.show_week()
 
     def goto_next_week(self):
         self.week_start += datetime.timedelta(days=7)
-        self.update_weekend_view()
+        self.show_week()
 
 if __name__ == "__main__":
+    perf.start_profile()
     ctk.set_appearance_mode("light")
     app = TaskManagerApp()
     app.mainloop()
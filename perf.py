@@ -0,0 +1,107 @@
+# Mesures internes facultatives, à joindre aux rapports de bug.
+#
+#   TODOTODAY_PERF=1            chronomètre les chemins critiques et compte
+#                               widgets créés/détruits et octets écrits ;
+#                               résumé ajouté à PERF_LOG en quittant (F12 dans l'application)
+#   TODOTODAY_PROFILE=fichier   enregistre un profil cProfile de la session
+#                               (lisible avec pstats ou snakeviz)
+#
+# Désactivé, @timed rend la fonction telle quelle : aucun coût à l'exécution.
+import atexit
+import datetime
+import functools
+import io
+import os
+import threading
+import time
+
+PERF_ENABLED = os.environ.get("TODOTODAY_PERF", "") not in ("", "0")
+PROFILE_FILE = os.environ.get("TODOTODAY_PROFILE") or None
+PERF_LOG = os.environ.get("TODOTODAY_PERF_LOG", "todotoday-perf.log")
+PROFILE_TOP = 30  # Fonctions reprises dans le résumé texte du profil
+
+_lock = threading.Lock()  # Le SaveWorker mesure depuis son propre thread
+timings = {}  # nom -> [appels, total, max] en secondes
+counters = {}  # nom -> valeur
+_profiler = None
+
+def timed(name):
+    def decorate(func):
+        if not PERF_ENABLED:
+            return func
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def record(name, seconds):
+    with _lock:
+        stat = timings.setdefault(name, [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] = max(stat[2], seconds)
+
+def count(name, n=1):
+    if PERF_ENABLED:
+        with _lock:
+            counters[name] = counters.get(name, 0) + n
+
+def reset():
+    with _lock:
+        timings.clear()
+        counters.clear()
+
+def summary():
+    with _lock:
+        stats = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+        values = sorted(counters.items())
+    lines = [f"{'mesure':<28} {'appels':>8} {'total ms':>10} {'moy. ms':>9} {'max ms':>9}"]
+    for name, (calls, total, worst) in stats:
+        lines.append(f"{name:<28} {calls:>8} {total * 1000:>10.1f} {total * 1000 / calls:>9.2f} {worst * 1000:>9.2f}")
+    if values:
+        lines.append("")
+        lines.extend(f"{name:<28} {value:>8}" for name, value in values)
+    return "\n".join(lines)
+
+def write_report(path=PERF_LOG):
+    # Ajouté au journal de mesures : plusieurs sessions à la suite restent comparables
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"=== {datetime.datetime.now().isoformat(timespec='seconds')} (pid {os.getpid()})\n")
+        f.write(summary() + "\n\n")
+    return path
+
+def start_profile():
+    # Le profil ne couvre que le thread appelant (le thread Tk)
+    global _profiler
+    if PROFILE_FILE is None or _profiler is not None:
+        return
+    import cProfile
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    atexit.register(stop_profile)
+
+def stop_profile():
+    global _profiler
+    if _profiler is None:
+        return None
+    _profiler.disable()
+    _profiler.dump_stats(PROFILE_FILE)
+    import pstats
+    text = io.StringIO()
+    pstats.Stats(_profiler, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    with open(PROFILE_FILE + ".txt", "w", encoding="utf-8") as f:
+        f.write(text.getvalue())
+    _profiler = None
+    return PROFILE_FILE
+
+def _report_at_exit():
+    if timings or counters:
+        write_report()
+
+if PERF_ENABLED:
+    atexit.register(_report_at_exit)
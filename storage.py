@@ -0,0 +1,1903 @@
+# Persistance des tâches : tasks.json et son journal, base SQLite, fichiers
+# mensuels, écritures en arrière-plan, import et export en flux.
+import calendar
+import datetime
+import json
+import os
+import re
+import codecs
+import hashlib
+import queue
+import threading
+import time
+from collections import Counter, OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou par msvcrt
+    fcntl = None
+    import msvcrt
+
+import perf
+from core import COUNT_SLOTS, SEARCH_LIMIT, STATUTS, TASK_FIELDS, Occurrence, Recurrence, SearchIndex, Task, assign_ids, normalize_task, search_terms, build_date_index, build_day_counts, count_slot, filter_tasks, day_ordinal, day_range, day_string
+
+STORAGE_BACKEND = os.environ.get("TODOTODAY_STORAGE", "json")  # "json", "sqlite" ou "mois"
+TASKS_FILE = "tasks.json"
+DB_FILE = "tasks.db"
+SHARD_DIR = "tasks"  # Stockage « mois » : un fichier AAAA-MM.json par mois
+SHARD_CACHE = 6  # Mois gardés en mémoire au plus (les moins récemment affichés sont libérés)
+SHARD_NEXT_ID = os.path.join(SHARD_DIR, "next_id")  # Prochain identifiant libre, tous mois confondus
+RECURRENCES_FILE = "recurrences.json"  # Tâches répétées, pour les deux stockages
+JOURNAL_FILE = TASKS_FILE + ".journal"
+LOCK_FILE = TASKS_FILE + ".lock"  # Verrou partagé par les instances ouvertes (fenêtres, cli.py)
+IDS_FILE = TASKS_FILE + ".ids"  # Prochain identifiant libre, réservé par blocs entre instances
+ID_BLOCK = 64  # Identifiants réservés à la fois
+JOURNAL_MODE = True  # Chaque modification est ajoutée au journal au lieu de réécrire tasks.json
+JOURNAL_COMPACT_EVERY = 500  # Nombre d'entrées avant compactage en tâche de fond
+SAVE_DELAY = 0.3  # Secondes pendant lesquelles les écritures d'une rafale sont regroupées
+WATCH_INTERVAL = 1.0  # Secondes entre deux vérifications des écritures d'un autre processus
+IMPORT_CHUNK_SIZE = 1 << 16  # Octets lus à chaque fois dans le fichier importé
+IMPORT_BATCH = 500  # Tâches insérées par lot
+IMPORT_QUEUE_DEPTH = 4  # Lots analysés d'avance au maximum (borne la mémoire)
+EXPORT_FORMATS = {"JSON": ".json", "NDJSON": ".ndjson", "CSV": ".csv"}
+LEGACY_FILE = "todo.json"  # Ancien format (TodoToday 0.1beta4) : date -> [[texte, fait], ...]
+LEGACY_BATCH_DAYS = 200  # Jours convertis entre deux points de reprise
+JSON_SPACES = re.compile(r"[ \t\r\n]*")
+JSON_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")  # suite possible d'un nombre coupé
+
+@perf.timed("load_tasks")
+def load_tasks(journal=None, path=TASKS_FILE):
+    data = b""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            data = f.read()
+    tasks = [Task.from_dict(obj) for obj in json.loads(data.decode("utf-8"))] if data.strip() else []
+    if journal is not None:
+        journal.replay(tasks, snapshot_token(data))
+        journal.mark()
+    return tasks
+
+@perf.timed("save_tasks")
+def save_tasks(tasks, path=TASKS_FILE):
+    data = dump_tasks(tasks)
+    perf.count("bytes_written", len(data))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return data
+
+def load_recurrences():
+    if not os.path.exists(RECURRENCES_FILE):
+        return {}
+    with open(RECURRENCES_FILE, "r", encoding="utf-8") as f:
+        rules = [Recurrence.from_dict(obj) for obj in json.load(f)]
+    return {rule.id: rule for rule in rules}
+
+def save_recurrences(rules):
+    data = dump_json(rules, indent=2).encode("utf-8")
+    perf.count("bytes_written", len(data))
+    tmp = RECURRENCES_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, RECURRENCES_FILE)
+
+def dump_json(obj, **kwargs):
+    # Les Task sont écrites sous leur forme JSON d'origine
+    return json.dumps(obj, ensure_ascii=False, default=Task.to_dict, **kwargs)
+
+def dump_tasks(tasks):
+    # Contenu de tasks.json ; des dict déjà construits s'encodent plus vite que par default=
+    return dump_json([t.to_dict() for t in tasks], indent=2).encode("utf-8")
+
+def snapshot_token(data):
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+def file_stamp(path):
+    # Signature d'un fichier : elle change quand un autre processus le remplace
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+def record_target(record):
+    # Identifiant de la tâche visée par une entrée de journal (None : entrée positionnelle)
+    if "task" not in record:
+        return record.get("id")
+    task = record["task"]
+    return task.id if isinstance(task, Task) else task.get("id")
+
+def reserve_id_range(count, floor):
+    # Appelé sous le verrou : count identifiants pris dans tasks.json.ids, à
+    # partir de floor au moins ; renvoie le premier
+    start = max(load_next_id(IDS_FILE) or 0, floor)
+    save_next_id(start + count, IDS_FILE)
+    return start
+
+def number_tasks(tasks):
+    # Appelé sous le verrou : identifiants des tâches d'un tasks.json écrit sans
+    # eux (script, version antérieure), réservés comme ceux des ajouts ; renvoie
+    # le nombre d'identifiants attribués
+    seen = set()
+    missing = []
+    for task in tasks:
+        if task.id is None or task.id in seen:
+            missing.append(task)
+        else:
+            seen.add(task.id)
+    if missing:
+        start = reserve_id_range(len(missing), max(seen, default=0) + 1)
+        for offset, task in enumerate(missing):
+            task.id = start + offset
+    return len(missing)
+
+def merge_records(snapshot, records):
+    # Instantané complété par les entrées écrites entre-temps par un autre processus
+    tasks = {task.id: task for task in snapshot}
+    for record in records:
+        apply_journal_record(tasks, record)
+    return tasks.values()
+
+def items_touched(items):
+    # Identifiants touchés par des écritures en attente ; None : un instantané
+    # qui remplace tout
+    touched = set()
+    for kind, data in items:
+        if kind == "entry":
+            touched.add(data[1])
+        elif kind == "snapshot":
+            if data[1] is None:
+                return None
+            touched |= data[1]
+    return touched
+
+def apply_change(snapshot, kind, payload, touched):
+    # Instantané complété par une modification d'un autre processus, sauf pour
+    # les tâches de touched
+    if kind == "reload":
+        return merge_snapshot(snapshot, payload, touched)
+    return merge_records(snapshot, [r for r in payload if record_target(r) not in touched])
+
+def merge_snapshot(snapshot, theirs, touched):
+    # tasks.json remplacé par un autre processus : son contenu, plus nos versions
+    # des tâches modifiées ou supprimées ici depuis notre dernière lecture
+    tasks = {task.id: task.copy() for task in theirs}
+    for task_id in touched:
+        tasks.pop(task_id, None)
+    for task in snapshot:
+        if task.id in touched:
+            tasks[task.id] = task
+    return tasks.values()
+
+def apply_journal_record(tasks, record):
+    # tasks : dict id -> tâche ; les journaux antérieurs aux identifiants
+    # désignent les tâches par leur position dans une liste
+    op = record["op"]
+    if op == "add":
+        task = Task.from_dict(record["task"])
+        if isinstance(tasks, list):
+            tasks.append(task)
+        else:
+            tasks[task.id] = task
+    elif "i" in record:
+        if op == "set":
+            tasks[record["i"]] = Task.from_dict(record["task"])
+        elif op == "del":
+            del tasks[record["i"]]
+    elif op == "set":
+        # Tâche absente : supprimée par un autre processus, cette modification la rétablit
+        task = Task.from_dict(record["task"])
+        current = tasks.get(task.id)
+        if current is not None and current.day != task.day:
+            del tasks[task.id]  # rangée en fin, comme dans l'index de l'application
+        tasks[task.id] = task
+    elif op == "del":
+        tasks.pop(record["id"], None)
+
+def iter_json_array(f, chunk_size=IMPORT_CHUNK_SIZE):
+    # Analyse incrémentale d'un tableau JSON ouvert en binaire : les éléments
+    # sont produits un par un, seul un morceau du fichier est en mémoire
+    return iter_json_items(f, "[", chunk_size)
+
+def iter_json_object(f, chunk_size=IMPORT_CHUNK_SIZE):
+    # Idem pour un objet JSON : paires (clé, valeur) dans l'ordre du fichier
+    return iter_json_items(f, "{", chunk_size)
+
+def iter_json_items(f, opening, chunk_size=IMPORT_CHUNK_SIZE):
+    keyed = opening == "{"
+    closing = "}" if keyed else "]"
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buf = ""
+    eof = False
+    started = False
+    count = 0
+    separator = False  # un élément vient d'être lu : virgule ou fermeture attendue
+    need_more = True
+    while True:
+        if need_more:
+            if eof:
+                raise ValueError("fin de fichier inattendue")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += utf8.decode(chunk, final=eof)
+            need_more = False
+        buf = buf.lstrip()
+        if not buf:
+            need_more = True
+            continue
+        if not started:
+            if buf[0] != opening:
+                raise ValueError(f"le fichier doit contenir un {'objet' if keyed else 'tableau'} JSON")
+            buf = buf[1:]
+            started = True
+            continue
+        if buf[0] == closing:
+            if count and not separator:
+                raise ValueError("virgule en trop avant la fin")
+            return
+        if separator:
+            if buf[0] != ",":
+                raise ValueError(f"virgule manquante : {buf[:80]}")
+            buf = buf[1:]
+            separator = False
+            continue
+        if buf[0] == ",":
+            raise ValueError(f"virgule en trop : {buf[:80]}")
+        try:
+            if keyed:
+                key, end = decoder.raw_decode(buf)
+                end = JSON_SPACES.match(buf, end).end()
+                if not isinstance(key, str) or buf[end:end + 1] != ":":
+                    raise ValueError(f"clé invalide : {buf[:80]}")
+                value, end = decoder.raw_decode(buf, JSON_SPACES.match(buf, end + 1).end())
+                obj = key, value
+            else:
+                obj, end = decoder.raw_decode(buf)
+        except ValueError:
+            if eof:
+                raise
+            need_more = True  # élément coupé en fin de morceau
+            continue
+        if not eof and JSON_NUMBER_TAIL.match(buf, end).end() == len(buf):
+            need_more = True  # un nombre pourrait être coupé en fin de morceau (« -12. » puis « 5e3 »)
+            continue
+        yield obj
+        count += 1
+        separator = True
+        buf = buf[end:]
+
+def iter_legacy_days(f):
+    # Ancien todo.json lu en flux : (date, tâches) jour par jour. Les cases
+    # cochées deviennent « fait », l'urgence est la plus basse.
+    for date, entries in iter_json_object(f):
+        if not isinstance(entries, list):
+            raise ValueError(f"jour invalide : {date}")
+        tasks = []
+        for entry in entries:
+            if not isinstance(entry, list) or len(entry) != 2 or not isinstance(entry[0], str):
+                raise ValueError(f"entrée invalide le {date} : {str(entry)[:80]}")
+            text, done = entry
+            tasks.append({"titre": text.strip(), "date": date, "statut": STATUTS[1] if done else STATUTS[0]})
+        yield date, tasks
+
+def convert_legacy(store, path=LEGACY_FILE, progress=None):
+    # Reprend l'ancien todo.json dans le stockage courant, par lots de jours.
+    # Après chaque lot enregistré, le nombre de jours traités est noté dans
+    # path + ".reprise" : une conversion interrompue repart de là. Une tâche
+    # déjà présente (même jour, même titre) n'est pas ajoutée une seconde fois,
+    # la reprise reste donc sûre si l'interruption tombe entre l'écriture
+    # d'un lot et celle du point de reprise, ou si la conversion est relancée.
+    checkpoint_path = path + ".reprise"
+    stat = os.stat(path)
+    source = {"taille": stat.st_size, "modifie": stat.st_mtime}
+    skip = 0
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("source") == source:
+            skip = checkpoint["jours"]
+
+    def commit(batch, days):
+        store.begin_import("merge")
+        store.import_batch(batch)
+        store.end_import()
+        exc = store.flush()
+        if exc is not None:
+            raise exc
+        tmp = checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"source": source, "jours": days}, f)
+        os.replace(tmp, checkpoint_path)
+
+    days = added = present = invalid = 0
+    batch = []
+    with open(path, "rb") as f:
+        for date, entries in iter_legacy_days(f):
+            days += 1
+            if days <= skip:
+                continue
+            try:
+                tasks = [Task.from_dict(obj) for obj in entries]
+            except ValueError:
+                invalid += 1  # L'ancienne version acceptait des dates illisibles
+                continue
+            if tasks:
+                store.load_range(date, date)
+                existing = Counter(t.titre for t in store.day_tasks(tasks[0].day) if not isinstance(t, Occurrence))
+                for task in tasks:
+                    if existing[task.titre]:
+                        existing[task.titre] -= 1
+                        present += 1
+                    else:
+                        batch.append(task)
+            if days % LEGACY_BATCH_DAYS == 0:
+                added += len(batch)
+                commit(batch, days)
+                batch = []
+                if progress:
+                    progress(days, added)
+        added += len(batch)
+        commit(batch, days)
+    os.remove(checkpoint_path)
+    if progress:
+        progress(days, added)
+    return added, present, invalid
+
+def export_json(tasks, f):
+    # Un élément par ligne : le document n'est jamais construit en mémoire
+    sep = "\n  "
+    f.write("[")
+    for task in tasks:
+        f.write(sep + dump_json(task.to_dict()))
+        sep = ",\n  "
+    f.write("\n]\n" if sep != "\n  " else "]\n")
+
+def export_ndjson(tasks, f):
+    for task in tasks:
+        f.write(dump_json(task.to_dict()) + "\n")
+
+def export_csv(tasks, f):
+    import csv
+    writer = csv.writer(f)
+    writer.writerow(TASK_FIELDS)
+    for task in tasks:
+        writer.writerow(task.values())
+
+def export_tasks_to(path, fmt, tasks):
+    # tasks peut être un générateur : les tâches sont écrites au fil de la lecture
+    count = 0
+    def counted():
+        nonlocal count
+        for task in tasks:
+            count += 1
+            yield task
+    writer = {"JSON": export_json, "NDJSON": export_ndjson, "CSV": export_csv}[fmt]
+    with open(path, "w", encoding="utf-8", newline="" if fmt == "CSV" else None) as f:
+        writer(counted(), f)
+    return count
+
+class FileLock:
+    # Verrou consultatif entre processus autour des lectures et écritures de
+    # tasks.json et de son journal ; les threads d'un même processus se
+    # l'échangent aussi. Non réentrant.
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self.thread_lock = threading.Lock()
+        self.file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        try:
+            self.file = open(self.path, "ab")
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            else:
+                # Premier octet du fichier, même vide ; réessaie pendant 10 s puis OSError
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is None:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            self.file.close()  # libère aussi le verrou flock
+        finally:
+            self.file = None
+            self.thread_lock.release()
+
+class TaskJournal:
+    # Journal en ajout seul à côté de tasks.json. Chaque compactage ouvre une
+    # génération : une ligne {"gen": n} marque le point de copie, puis
+    # {"gen": n, "snapshot": empreinte} lie cette génération au fichier écrit.
+    # Au chargement on rejoue les entrées qui suivent la génération dont
+    # l'empreinte correspond au tasks.json présent sur le disque, ce qui reste
+    # correct quel que soit le moment d'une interruption.
+    # D'autres processus peuvent ajouter leurs entrées au même journal : offset
+    # et stamp disent jusqu'où ce processus a lu le journal et quel tasks.json
+    # il connaît, changes() lit la suite.
+    def __init__(self, path=JOURNAL_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.records = 0
+        self.offset = 0
+        self.stamp = None
+
+    def replay(self, tasks, token):
+        if not os.path.exists(self.path):
+            self.start(token)
+            return
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # dernière ligne tronquée par un arrêt brutal
+        bound = {e["gen"] for e in entries if e.get("snapshot") == token}
+        pending = None
+        for entry in entries:
+            if "op" in entry:
+                if pending is not None:
+                    pending.append(entry)
+            else:
+                self.generation = max(self.generation, entry["gen"])
+                if "snapshot" not in entry and entry["gen"] in bound:
+                    pending = []
+        if pending is None:
+            # tasks.json a été remplacé hors de l'application : on met le journal de côté
+            os.replace(self.path, self.path + ".orphelin")
+            self.start(token)
+            return
+        by_id = {t.id: t for t in tasks}
+        if None in by_id or len(by_id) != len(tasks) or any("i" in entry for entry in pending):
+            for entry in pending:
+                apply_journal_record(tasks, entry)
+        else:
+            for entry in pending:
+                apply_journal_record(by_id, entry)
+            tasks[:] = by_id.values()
+        self.records = len(pending)
+
+    def mark(self):
+        # Tout ce qui est sur le disque est désormais connu de ce processus
+        self.offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self.stamp = file_stamp(TASKS_FILE)
+
+    def changed(self):
+        # Vérification rapide, sans verrou, avant d'appeler changes()
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return size != self.offset or file_stamp(TASKS_FILE) != self.stamp
+
+    def changes(self):
+        # Appelé sous le verrou : ce qu'un autre processus a écrit depuis mark().
+        # Renvoie None, ("entries", entrées ajoutées) ou ("reload", tâches) quand
+        # tasks.json a été remplacé (compactage d'une autre instance, script)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if file_stamp(TASKS_FILE) != self.stamp or size < self.offset:
+            tasks = load_tasks(self)
+            if number_tasks(tasks):
+                # Sans ces identifiants sur le disque, le prochain chargement en
+                # attribuerait d'autres
+                self.write_snapshot(tasks)
+            return "reload", tasks
+        if size == self.offset:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset = size
+        records = []
+        for line in data.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # ligne tronquée par un arrêt brutal de l'autre processus
+            if "op" in entry:
+                records.append(entry)
+            else:
+                self.generation = max(self.generation, entry["gen"])
+        return ("entries", records) if records else None
+
+    def start(self, token):
+        with self.lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"gen": self.generation}) + "\n")
+                f.write(json.dumps({"gen": self.generation, "snapshot": token}) + "\n")
+
+    def write_lines(self, lines):
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                start = f.tell()
+                f.writelines(lines)
+                perf.count("bytes_written", f.tell() - start)
+            self.offset = os.path.getsize(self.path)
+
+    @perf.timed("journal.write_snapshot")
+    def write_snapshot(self, snapshot):
+        # Le marqueur précède l'écriture : les entrées déjà journalisées sont
+        # toutes contenues dans l'instantané
+        self.generation += 1
+        gen = self.generation
+        self.write_lines([json.dumps({"gen": gen}) + "\n"])
+        data = dump_tasks(snapshot)
+        perf.count("bytes_written", len(data))
+        tmp = TASKS_FILE + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.write_lines([json.dumps({"gen": gen, "snapshot": snapshot_token(data)}) + "\n"])
+        os.replace(tmp, TASKS_FILE)
+        # Les entrées antérieures à la génération sont désormais dans tasks.json
+        with self.lock:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            marker = json.dumps({"gen": gen}) + "\n"
+            keep = lines[lines.index(marker):] if marker in lines else lines
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                f.writelines(keep)
+            os.replace(self.path + ".tmp", self.path)
+        self.mark()
+
+class SaveWorker(threading.Thread):
+    # Toutes les écritures disque passent par ce thread, dans l'ordre de
+    # soumission. Les rafales (plusieurs glisser-déposer rapides, par exemple)
+    # sont regroupées en une seule écriture après SAVE_DELAY secondes.
+    # Avec un verrou (tasks.json), les écritures des autres processus sont lues
+    # juste avant les nôtres et transmises à l'interface par la file external.
+    def __init__(self, journal=None, db=None, shards=None, lock=None):
+        super().__init__(daemon=True)
+        self.journal = journal
+        self.db = db
+        self.shards = shards
+        self.lock = lock
+        self.external = queue.Queue()  # (numéro, genre, contenu, identifiants écrits par nous depuis)
+        self.read_seq = 0  # numéro de la dernière modification extérieure lue
+        self.merged_seq = 0  # numéro de la dernière fusionnée par l'interface
+        # (numéro, genre, contenu, identifiants écrits par nous depuis la lecture) :
+        # modifications lues, à reprendre dans les instantanés plus anciens
+        self.unmerged = []
+        self.lost = set()  # identifiants des écritures échouées, None : un instantané complet perdu
+        self.id_blocks = queue.Queue()  # (début, nombre) réservés d'avance pour l'interface
+        self.cond = threading.Condition()
+        self.items = []
+        self.busy = False
+        self.urgent = False
+        self.closed = False
+        self.entries = journal.records if journal is not None else 0
+        self.errors = queue.Queue()
+        self.start()
+
+    def submit_entry(self, record):
+        # Sérialisé tout de suite : la tâche peut encore changer avant l'écriture
+        line = dump_json(record) + "\n"
+        with self.cond:
+            self.items.append(("entry", (line, record_target(record))))
+            self.entries += 1
+            self.cond.notify_all()
+
+    def submit_snapshot(self, tasks, touched=None):
+        # touched : identifiants modifiés ou supprimés par cette écriture, qui
+        # l'emportent sur ce qu'un autre processus a écrit entre-temps ; None :
+        # l'instantané remplace tout (import en remplacement, par exemple)
+        snapshot = [t.copy() for t in tasks]
+        with self.cond:
+            # L'instantané contient déjà toutes les tâches qui attendaient encore
+            # d'être écrites ; il reprend aussi ce qu'elles touchaient
+            if touched is not None:
+                pending = items_touched(self.items)
+                touched = None if pending is None else pending | set(touched)
+            # merged_seq : modifications extérieures déjà fusionnées dans ces tâches
+            self.items = [item for item in self.items if item[0] in ("rules", "ids")]
+            self.items.append(("snapshot", (snapshot, touched, self.merged_seq)))
+            self.entries = 0
+            self.cond.notify_all()
+
+    def submit_rules(self, rules):
+        with self.cond:
+            # Seul le dernier état des répétitions compte
+            self.items = [item for item in self.items if item[0] != "rules"] + [("rules", rules)]
+            self.cond.notify_all()
+
+    def submit_shard(self, month, tasks):
+        snapshot = [t.copy() for t in tasks]
+        with self.cond:
+            # Seul le dernier état du mois compte
+            self.items = [item for item in self.items if item[0] != "shard" or item[1][0] != month]
+            self.items.append(("shard", (month, snapshot)))
+            self.cond.notify_all()
+
+    def submit_sql(self, statement, params=()):
+        with self.cond:
+            self.items.append(("sql", (statement, params)))
+            self.cond.notify_all()
+
+    def submit_ids(self, count, floor):
+        # Bloc d'identifiants réservé sous le verrou par ce thread, pas par l'interface
+        with self.cond:
+            self.items.append(("ids", (count, floor)))
+            self.cond.notify_all()
+
+    def merged(self, seq):
+        # Appelé par l'interface après fusion : les instantanés soumis ensuite
+        # contiennent cette modification
+        with self.cond:
+            self.merged_seq = seq
+            oldest = min([data[2] for kind, data in self.items if kind == "snapshot"] + [seq])
+            self.unmerged = [change for change in self.unmerged if change[0] > oldest]
+
+    def kept_ids(self, own):
+        # Tâches à ne pas prendre dans une modification extérieure : écrites par
+        # nous depuis sa lecture, ou encore en attente. None : un instantané en
+        # attente remplace tout
+        with self.cond:
+            pending = items_touched(self.items)
+            return None if pending is None else own | pending
+
+    def take_lost(self):
+        with self.cond:
+            lost, self.lost = self.lost, set()
+        return lost
+
+    def run(self):
+        while True:
+            with self.cond:
+                if not self.items and not self.closed:
+                    # Rien à écrire : on regarde de temps en temps ce qu'écrivent les autres
+                    self.cond.wait(WATCH_INTERVAL if self.lock is not None and self.journal is not None else None)
+                if not self.items and self.closed:
+                    return
+                if self.items:
+                    deadline = time.monotonic() + SAVE_DELAY
+                    while not (self.urgent or self.closed):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.cond.wait(remaining)
+                items, self.items = self.items, []
+                # Ces écritures passent après les modifications déjà lues
+                written = items_touched(items)
+                if written:
+                    for change in self.unmerged:
+                        change[3].update(written)
+                unmerged = list(self.unmerged)
+                self.busy = True
+            try:
+                self.write(items, unmerged)
+            except Exception as exc:
+                touched = items_touched(items)
+                with self.cond:
+                    self.lost = None if touched is None or self.lost is None else self.lost | touched
+                self.errors.put(exc)
+            finally:
+                with self.cond:
+                    self.busy = False
+                    self.cond.notify_all()
+
+    def write(self, items, unmerged):
+        if self.lock is None:
+            self.write_items(items)
+            return
+        if not items and (self.journal is None or not self.journal.changed()):
+            return  # vérification rapide, sans verrou
+        with self.lock:
+            for kind, data in items:
+                if kind == "ids":
+                    self.id_blocks.put((reserve_id_range(*data), data[0]))
+            items = [item for item in items if item[0] != "ids"]
+            touched = items_touched(items)
+            change = self.journal.changes() if self.journal is not None else None
+            if change is not None:
+                unmerged.append(self.read_change(*change, touched))
+            if touched is None:
+                # Notre instantané remplace tout : ce qui a été lu n'a plus cours
+                self.discard_changes()
+            else:
+                items = [(kind, (self.catch_up(data, unmerged, touched), data[1], data[2]) if kind == "snapshot" else data)
+                         for kind, data in items]
+            self.write_items(items)
+
+    def read_change(self, kind, payload, touched):
+        # Transmise à l'interface, qui la fusionne sans toucher aux tâches que
+        # nous écrivons (nos entrées passent après les leurs)
+        if kind == "entries":
+            payload = [record for record in payload if record_target(record) is not None]
+        with self.cond:
+            self.read_seq += 1
+            change = (self.read_seq, kind, payload, set(touched or ()))
+            self.unmerged.append(change)
+        shared = [task.copy() for task in payload] if kind == "reload" else payload
+        self.external.put((self.read_seq, kind, shared, change[3]))
+        return change
+
+    def catch_up(self, data, unmerged, touched):
+        # Modifications lues après la copie des tâches de l'instantané
+        snapshot, _, merged_seq = data
+        for seq, kind, payload, own in unmerged:
+            if seq > merged_seq:
+                snapshot = apply_change(snapshot, kind, payload, touched | own)
+        return snapshot
+
+    def discard_changes(self):
+        with self.cond:
+            self.unmerged = []
+        while not self.external.empty():
+            self.external.get_nowait()
+
+    @perf.timed("saver.write")
+    def write_items(self, items):
+        lines = []
+        statements = []
+        shards = {}
+        for kind, payload in items:
+            if kind == "entry":
+                lines.append(payload[0])
+            elif kind == "sql":
+                statements.append(payload)
+            elif kind == "shard":
+                shards[payload[0]] = payload[1]
+            elif kind == "rules":
+                save_recurrences(payload)
+            elif self.journal is not None:
+                self.journal.write_snapshot(payload[0])
+            else:
+                save_tasks(payload[0])
+        if lines:
+            self.journal.write_lines(lines)
+        if statements:
+            # Une rafale de modifications = une seule transaction
+            self.db.execute_batch(statements)
+        if shards:
+            self.shards.write_shards(shards)
+
+    def flush(self):
+        with self.cond:
+            self.urgent = True
+            self.cond.notify_all()
+            while self.items or self.busy:
+                self.cond.wait()
+            self.urgent = False
+
+    def close(self):
+        self.flush()
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.join()
+
+class ImportWorker(threading.Thread):
+    # Lit le fichier importé hors du thread Tk et le découpe en lots ; la file
+    # bornée ralentit la lecture si l'interface n'insère pas assez vite
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.batches = queue.Queue(maxsize=IMPORT_QUEUE_DEPTH)
+        self.cancelled = False
+        self.start()
+
+    def run(self):
+        try:
+            with open(self.path, "rb") as f:
+                total = os.fstat(f.fileno()).st_size or 1
+                batch = []
+                for obj in iter_json_array(f):
+                    batch.append(normalize_task(obj))
+                    if len(batch) >= IMPORT_BATCH:
+                        self.put(("batch", batch, f.tell() / total))
+                        batch = []
+                    if self.cancelled:
+                        return
+                self.put(("batch", batch, 1.0))
+            self.put(("done", None, 1.0))
+        except Exception as exc:
+            self.put(("error", exc, 1.0))
+
+    def put(self, item):
+        while not self.cancelled:
+            try:
+                self.batches.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                pass
+
+class TaskStore:
+    # Interface commune des stockages : l'index par date ne contient que les
+    # jours chargés, les modifications passent par add/update/delete.
+    # update reçoit la tâche modifiée et une copie faite avant la modification.
+    def __init__(self):
+        self.tasks_by_date = {}
+        self.by_id = {}  # id -> tâche, pour les jours chargés
+        self.day_counts = {}  # jour -> compteurs par (statut, urgence), tenus à jour à chaque modification
+        self.recurrences = load_recurrences()  # id -> Recurrence
+        self.occurrences = {}  # jour -> occurrences calculées pour ce jour
+        self.expanded = set()  # jours dont les occurrences sont calculées
+
+    def load_range(self, first, last):
+        self.expand_recurrences(first, last)
+
+    def expand_recurrences(self, first, last):
+        # Les répétitions ne sont développées que pour les jours demandés
+        missing = [day for day in day_range(first, last) if day not in self.expanded]
+        if not missing:
+            return
+        wanted = set(missing)
+        for rule in self.recurrences.values():
+            for occurrence in rule.occurrences(missing[0], missing[-1]):
+                if occurrence.day in wanted:
+                    self.occurrences.setdefault(occurrence.day, []).append(occurrence)
+        self.expanded.update(missing)
+
+    def day_tasks(self, day):
+        tasks = self.tasks_by_date.get(day, [])
+        occurrences = self.occurrences.get(day)
+        return tasks + occurrences if occurrences else tasks
+
+    def counts_loaded(self, day):
+        return True
+
+    def load_counts(self, first, last):
+        pass
+
+    def count_task(self, task, delta):
+        if not self.counts_loaded(task.day):
+            return
+        counts = self.day_counts.get(task.day)
+        if counts is None:
+            counts = self.day_counts[task.day] = [0] * COUNT_SLOTS
+        counts[count_slot(task)] += delta
+
+    def overview_counts(self, first, last):
+        # Compteurs de la vue d'ensemble : copiés depuis day_counts (jamais
+        # recalculés sur la liste des tâches) plus les occurrences des répétitions
+        self.load_counts(first, last)
+        days = day_range(first, last)
+        counts = {}
+        for day in days:
+            day_counts = self.day_counts.get(day)
+            if day_counts is not None and any(day_counts):
+                counts[day] = list(day_counts)
+        for rule in self.recurrences.values():
+            for occurrence in rule.occurrences(days.start, days.stop - 1):
+                day_counts = counts.get(occurrence.day)
+                if day_counts is None:
+                    day_counts = counts[occurrence.day] = [0] * COUNT_SLOTS
+                day_counts[count_slot(occurrence)] += 1
+        return counts
+
+    def persist_recurrences(self):
+        self.occurrences = {}
+        self.expanded = set()
+        self.saver.submit_rules([rule.to_dict() for rule in self.recurrences.values()])
+
+    def add_recurrence(self, rule):
+        rule.id = max(self.recurrences, default=0) + 1
+        self.recurrences[rule.id] = rule
+        self.persist_recurrences()
+
+    def update_occurrence(self, occurrence, persist=True):
+        # Seuls les champs qui diffèrent de la règle sont enregistrés
+        rule = occurrence.rule
+        base = rule.base_occurrence(occurrence.origin).values()
+        fields = {f: v for f, v, b in zip(TASK_FIELDS, occurrence.values(), base) if v != b}
+        if fields:
+            rule.overrides[occurrence.origin] = fields
+        else:
+            rule.overrides.pop(occurrence.origin, None)
+        if persist:
+            self.persist_recurrences()
+
+    def delete_occurrence(self, occurrence, series=False):
+        rule = occurrence.rule
+        if series:
+            self.recurrences.pop(rule.id, None)
+        else:
+            rule.exceptions.add(occurrence.origin)
+            rule.overrides.pop(occurrence.origin, None)
+        self.persist_recurrences()
+
+    def split_occurrences(self, changes):
+        # Les occurrences d'une modification en masse deviennent des modifications de leur règle
+        occurrences = [task for task, _ in changes if isinstance(task, Occurrence)]
+        if not occurrences:
+            return changes
+        for occurrence in occurrences:
+            self.update_occurrence(occurrence, persist=False)
+        self.persist_recurrences()
+        return [(task, before) for task, before in changes if not isinstance(task, Occurrence)]
+
+    def get(self, task_id):
+        return self.by_id.get(task_id)
+
+    def poll_changes(self):
+        # Jours modifiés par un autre processus depuis l'appel précédent ; seul
+        # tasks.json est surveillé (SQLite verrouille lui-même ses écritures)
+        return set()
+
+    def index_task(self, task):
+        self.tasks_by_date.setdefault(task.day, []).append(task)
+        self.by_id[task.id] = task
+
+    def unindex_task(self, task, day=None):
+        day = task.day if day is None else day
+        bucket = self.tasks_by_date.get(day, [])
+        for i, t in enumerate(bucket):
+            if t.id == task.id:
+                del bucket[i]
+                break
+        if not bucket:
+            self.tasks_by_date.pop(day, None)
+        self.by_id.pop(task.id, None)
+
+    def select(self, first=None, last=None, statut=None, urgence=None):
+        # Tâches « vivantes » (celles de l'index) d'une plage de dates, modifiables
+        # ensuite par update/update_many, contrairement aux copies d'iter_tasks
+        low, high = self.date_bounds()
+        if low is None:
+            return []
+        first = max(first or low, low)
+        last = min(last or high, high)
+        if first > last:
+            return []
+        self.load_range(first, last)
+        return [task for day in day_range(first, last)
+                for task in filter_tasks(self.day_tasks(day), statut=statut, urgence=urgence)]
+
+    def prepare_search(self, budget=None):
+        # Prépare la recherche par pas de budget tâches (tout d'un coup si None) ;
+        # True quand search peut répondre sans construire d'index
+        return True
+
+    def replace_all(self, tasks):
+        self.begin_import("replace")
+        self.import_batch([normalize_task(t) for t in tasks])
+        self.end_import()
+
+    def flush(self):
+        self.saver.flush()
+        return None if self.saver.errors.empty() else self.saver.errors.get_nowait()
+
+    def close(self):
+        self.saver.close()
+
+class JsonStore(TaskStore):
+    def __init__(self):
+        super().__init__()
+        self.journal = TaskJournal() if JOURNAL_MODE else None
+        self.file_lock = FileLock()
+        with self.file_lock:
+            tasks = load_tasks(self.journal)
+        self.next_id, assigned = assign_ids(tasks)
+        self.id_limit = self.next_id  # fin du bloc réservé : aucun pour l'instant
+        # Toutes les tâches sont chargées : l'index par id est la liste elle-même,
+        # dans l'ordre de tasks.json
+        self.tasks = self.by_id = {task.id: task for task in tasks}
+        self.tasks_by_date = build_date_index(tasks)
+        self.day_counts = build_day_counts(tasks)
+        self.search_index = None  # construit à la première recherche
+        self.search_pending = []  # tâches pas encore indexées dans search_index
+        self.saver = SaveWorker(self.journal, lock=self.file_lock)
+        self.id_requested = True  # premier bloc réservé en arrière-plan
+        self.saver.submit_ids(ID_BLOCK, self.next_id)
+        if assigned:
+            self.saver.submit_snapshot(tasks)  # identifiants des tâches d'un fichier antérieur
+
+    def date_bounds(self):
+        if not self.tasks_by_date:
+            return None, None
+        return day_string(min(self.tasks_by_date)), day_string(max(self.tasks_by_date))
+
+    def iter_tasks(self, first=None, last=None, statut=None, urgence=None):
+        if first and last and day_ordinal(last) - day_ordinal(first) < len(self.tasks_by_date):
+            # Plage courte : on lit seulement les jours concernés dans l'index
+            candidates = (t for day in day_range(first, last) for t in self.tasks_by_date.get(day, ()))
+        else:
+            candidates = iter(self.tasks.values())
+        return filter_tasks(candidates, first, last, statut, urgence)
+
+    def prepare_search(self, budget=None):
+        # Les modifications faites entre deux pas passent par l'index partiel :
+        # une tâche déjà indexée (ajoutée, modifiée) est sautée, une tâche
+        # supprimée n'est plus dans by_id
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            self.search_pending = list(self.tasks.values())
+        if self.search_pending:
+            start = 0 if budget is None else max(0, len(self.search_pending) - budget)
+            chunk = self.search_pending[start:]
+            del self.search_pending[start:]
+            self.search_index.extend(task for task in chunk
+                                     if self.by_id.get(task.id) is task and task not in self.search_index.terms)
+        return not self.search_pending
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        self.prepare_search()
+        return self.search_index.search(query, limit)
+
+    def persist(self, record):
+        if self.journal is None:
+            self.saver.submit_snapshot(self.tasks.values(), [record_target(record)])
+            return
+        self.saver.submit_entry(record)
+        if self.saver.entries >= JOURNAL_COMPACT_EVERY:
+            self.saver.submit_snapshot(self.tasks.values(), ())
+
+    def new_id(self):
+        if self.next_id >= self.id_limit:
+            self.next_block()
+        task_id = self.next_id
+        self.next_id += 1
+        if self.id_limit - self.next_id < ID_BLOCK // 2 and not self.id_requested:
+            # Le bloc suivant est demandé d'avance au thread d'écriture
+            self.id_requested = True
+            self.saver.submit_ids(ID_BLOCK, self.id_limit)
+        return task_id
+
+    def next_block(self):
+        # Bloc réservé d'avance ; s'il n'est pas encore arrivé (ajouts plus
+        # rapides que le thread d'écriture), on en réserve un ici
+        try:
+            start, count = self.saver.id_blocks.get_nowait()
+        except queue.Empty:
+            self.reserve_ids(ID_BLOCK)
+            return
+        self.id_requested = False
+        self.next_id = start
+        self.id_limit = start + count
+
+    def reserve_ids(self, count):
+        # Chaque instance prend ses identifiants par blocs dans tasks.json.ids :
+        # deux ajouts simultanés dans deux fenêtres ne reçoivent pas le même
+        with self.file_lock:
+            start = reserve_id_range(count, self.next_id)
+        self.next_id = start
+        self.id_limit = start + count
+
+    def poll_changes(self):
+        # Le thread d'écriture lit les écritures des autres processus ; on les
+        # fusionne ici, sauf pour les tâches que nous n'avons pas encore écrites
+        days = set()
+        while not self.saver.external.empty():
+            seq, kind, payload, own = self.saver.external.get_nowait()
+            kept = self.saver.kept_ids(own)
+            if kept is not None:
+                days |= self.merge_external(kind, payload, kept)
+            self.saver.merged(seq)
+        return days
+
+    def merge_external(self, kind, payload, own):
+        # Fusion dans l'index sans rien réécrire ; les tâches de own viennent
+        # d'être écrites par nous après les leurs et restent telles quelles
+        days = set()
+        if kind == "reload":
+            present = set()
+            for task in payload:
+                present.add(task.id)
+                if task.id not in own:
+                    days |= self.merge_task(task)
+            for task in [t for t in self.tasks.values() if t.id not in present and t.id not in own]:
+                days |= self.drop_task(task)
+            return days
+        for record in payload:
+            if record_target(record) is None:
+                continue  # entrée positionnelle d'une version antérieure
+            if record["op"] == "del":
+                task = self.by_id.get(record["id"])
+                if task is not None:
+                    days |= self.drop_task(task)
+            elif "task" in record:
+                days |= self.merge_task(Task.from_dict(record["task"]))
+        return days
+
+    def merge_task(self, task):
+        current = self.by_id.get(task.id)
+        if current is None:
+            self.index_task(task)
+            self.count_task(task, 1)
+            if self.search_index is not None:
+                self.search_index.add(task)
+            return {task.day}
+        if current.values() == task.values():
+            return set()
+        # Modifiée sur place : les lignes affichées gardent le même objet
+        before = current.copy()
+        current.titre, current.description, current.day = task.titre, task.description, task.day
+        current.urgence, current.statut = task.urgence, task.statut
+        if current.day != before.day:
+            self.unindex_task(current, before.day)
+            self.index_task(current)
+        self.count_task(before, -1)
+        self.count_task(current, 1)
+        if self.search_index is not None:
+            self.search_index.update(current)
+        return {before.day, current.day}
+
+    def drop_task(self, task):
+        self.unindex_task(task)
+        self.count_task(task, -1)
+        if self.search_index is not None:
+            self.search_index.remove(task)
+        return {task.day}
+
+    def add(self, task):
+        task.id = self.new_id()
+        self.index_task(task)
+        self.count_task(task, 1)
+        if self.search_index is not None:
+            self.search_index.add(task)
+        self.persist({"op": "add", "task": task})
+
+    def update(self, task, before):
+        if isinstance(task, Occurrence):
+            return self.update_occurrence(task)
+        if task.day != before.day:
+            self.unindex_task(task, before.day)
+            self.index_task(task)
+        self.count_task(before, -1)
+        self.count_task(task, 1)
+        if self.search_index is not None:
+            self.search_index.update(task)
+        self.persist({"op": "set", "id": task.id, "task": task})
+
+    def update_many(self, changes):
+        # Modification en masse : un seul instantané plutôt qu'une entrée par tâche
+        changes = self.split_occurrences(changes)
+        if not changes:
+            return
+        for task, before in changes:
+            if task.day != before.day:
+                self.unindex_task(task, before.day)
+                self.index_task(task)
+            self.count_task(before, -1)
+            self.count_task(task, 1)
+            if self.search_index is not None:
+                self.search_index.update(task)
+        self.saver.submit_snapshot(self.tasks.values(), [task.id for task, _ in changes])
+
+    def delete(self, task):
+        # Suppression par identifiant : deux tâches identiques restent distinctes
+        if isinstance(task, Occurrence):
+            return self.delete_occurrence(task)
+        self.unindex_task(task)
+        self.count_task(task, -1)
+        if self.search_index is not None:
+            self.search_index.remove(task)
+        self.persist({"op": "del", "id": task.id})
+
+    def delete_many(self, tasks):
+        for task in tasks:
+            self.unindex_task(task)
+            self.count_task(task, -1)
+            if self.search_index is not None:
+                self.search_index.remove(task)
+        if len(tasks) == 1:
+            self.persist({"op": "del", "id": tasks[0].id})
+        else:
+            self.saver.submit_snapshot(self.tasks.values(), [task.id for task in tasks])
+
+    def restore(self, tasks, replace=False):
+        # Tâches rendues par une annulation : leurs identifiants sont conservés
+        if replace:
+            self.tasks = self.by_id = {}
+            self.tasks_by_date = {}
+            self.day_counts = {}
+            self.search_index = None
+        for task in tasks:
+            self.index_task(task)
+            self.count_task(task, 1)
+            if self.search_index is not None:
+                self.search_index.add(task)
+        if len(tasks) == 1 and not replace:
+            self.persist({"op": "add", "task": tasks[0]})
+        else:
+            self.saver.submit_snapshot(self.tasks.values(), None if replace else [task.id for task in tasks])
+
+    def begin_import(self, mode):
+        self.import_mode = mode
+        self.imported = []
+
+    def import_batch(self, tasks):
+        self.imported.extend(tasks)
+
+    def end_import(self):
+        # Les identifiants du fichier importé ne sont pas repris : ils pourraient
+        # déjà servir ici
+        if self.id_limit - self.next_id < len(self.imported):
+            self.reserve_ids(len(self.imported))
+        for task in self.imported:
+            task.id = self.new_id()
+        if self.import_mode == "replace":
+            self.tasks = self.by_id = {task.id: task for task in self.imported}
+            self.tasks_by_date = build_date_index(self.imported)
+            self.day_counts = build_day_counts(self.imported)
+            self.search_index = None
+        else:
+            for task in self.imported:
+                self.index_task(task)
+                self.count_task(task, 1)
+                if self.search_index is not None:
+                    self.search_index.add(task)
+        imported, self.imported = self.imported, []
+        # Import complet : on écrit directement un nouvel instantané
+        self.saver.submit_snapshot(self.tasks.values(),
+                                   None if self.import_mode == "replace" else [task.id for task in imported])
+
+    def abort_import(self):
+        self.imported = []
+
+    def resync(self):
+        # Une entrée de journal perdue rendrait les suivantes incohérentes :
+        # on repart d'un instantané complet, où seules les tâches des écritures
+        # perdues l'emportent sur ce que les autres processus ont écrit
+        self.saver.submit_snapshot(self.tasks.values(), self.saver.take_lost())
+
+    def flush(self):
+        if self.journal is not None and self.saver.entries:
+            self.saver.submit_snapshot(self.tasks.values(), ())
+        return super().flush()
+
+# Le tokenizer unicode61 enlève les accents mais garde œ, æ et ß : l'index
+# reçoit le texte avec ces lettres déjà remplacées, comme core.fold_text
+SQL_LIGATURES = (("œ", "oe"), ("Œ", "OE"), ("æ", "ae"), ("Æ", "AE"), ("ß", "ss"), ("ẞ", "SS"))
+SQL_SCHEMA_VERSION = 1  # PRAGMA user_version ; 1 : index plein texte sans contenu, ligatures remplacées
+
+def sql_fold(column):
+    for letter, replacement in SQL_LIGATURES:
+        column = f"replace({column}, '{letter}', '{replacement}')"
+    return column
+
+SQL_FTS_VALUES = {prefix: f"{prefix}.id, {sql_fold(prefix + '.titre')}, {sql_fold(prefix + '.description')}"
+                  for prefix in ("new", "old", "tasks")}
+SQL_DROP_FTS = """
+DROP TRIGGER IF EXISTS tasks_fts_insert;
+DROP TRIGGER IF EXISTS tasks_fts_delete;
+DROP TRIGGER IF EXISTS tasks_fts_update;
+DROP TABLE IF EXISTS tasks_fts;
+"""
+SQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    titre TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    urgence TEXT NOT NULL,
+    statut TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks(date);
+CREATE INDEX IF NOT EXISTS idx_tasks_urgence ON tasks(urgence);
+CREATE INDEX IF NOT EXISTS idx_tasks_statut ON tasks(statut);
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    titre, description, content='',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts(rowid, titre, description) VALUES ({new});
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, titre, description) VALUES ('delete', {old});
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF titre, description ON tasks BEGIN
+    INSERT INTO tasks_fts(tasks_fts, rowid, titre, description) VALUES ('delete', {old});
+    INSERT INTO tasks_fts(rowid, titre, description) VALUES ({new});
+END;
+CREATE TABLE IF NOT EXISTS id_counter (next_id INTEGER NOT NULL);
+""".format(**SQL_FTS_VALUES)
+SQL_COLUMNS = ", ".join(TASK_FIELDS)
+SQL_INSERT = f"INSERT INTO tasks (id, {SQL_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)"
+SQL_UPDATE = "UPDATE tasks SET " + ", ".join(f"{f} = ?" for f in TASK_FIELDS) + " WHERE id = ?"
+
+def migrate_json_to_sqlite(db, path=TASKS_FILE):
+    # Migration unique : reprend tasks.json (et son journal) dans une base neuve
+    journal = TaskJournal() if os.path.exists(JOURNAL_FILE) else None
+    tasks = load_tasks(journal) if os.path.exists(path) else []
+    with db:
+        db.executemany(f"INSERT INTO tasks ({SQL_COLUMNS}) VALUES (?, ?, ?, ?, ?)",
+                       (t.values() for t in tasks))
+    return len(tasks)
+
+class SqliteStore(TaskStore):
+    # Seules les semaines affichées sont chargées, par requête sur l'index de date.
+    # Les écritures sont des INSERT/UPDATE/DELETE unitaires exécutés par le SaveWorker.
+    def __init__(self, path=DB_FILE):
+        super().__init__()
+        self.path = path
+        import sqlite3  # chargé seulement si ce stockage est choisi
+        new = not os.path.exists(path)
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version < SQL_SCHEMA_VERSION:
+            # Base créée avant la recherche, ou avec l'ancien index : il reprend les lignes existantes
+            self.db.executescript(SQL_DROP_FTS)
+        self.db.executescript(SQL_SCHEMA)
+        if version < SQL_SCHEMA_VERSION:
+            with self.db:
+                self.db.execute(f"INSERT INTO tasks_fts(rowid, titre, description) SELECT {SQL_FTS_VALUES['tasks']} FROM tasks")
+                self.db.execute(f"PRAGMA user_version = {SQL_SCHEMA_VERSION}")
+        if new and os.path.exists(TASKS_FILE):
+            migrate_json_to_sqlite(self.db)
+        self.writer = None
+        self.loaded = set()  # jours (ordinaux) présents dans l'index
+        self.counted = set()  # jours (ordinaux) présents dans day_counts
+        self.failed = []
+        self.next_id = self.id_limit = 0  # le premier ajout réserve un bloc
+        self.saver = SaveWorker(db=self)
+
+    @perf.timed("sqlite.execute_batch")
+    def execute_batch(self, statements):
+        # Appelé depuis le thread d'écriture, qui a sa propre connexion
+        if self.writer is None:
+            import sqlite3
+            self.writer = sqlite3.connect(self.path, check_same_thread=False)
+        try:
+            with self.writer:
+                for statement, params in statements:
+                    if isinstance(params, list):
+                        self.writer.executemany(statement, params)
+                    else:
+                        self.writer.execute(statement, params)
+        except Exception:
+            self.failed.extend(statements)
+            raise
+
+    @perf.timed("sqlite.load_range")
+    def load_range(self, first, last):
+        self.expand_recurrences(first, last)
+        missing = [day for day in day_range(first, last) if day not in self.loaded]
+        if not missing:
+            return
+        # Les écritures en attente doivent être visibles par la requête
+        self.saver.flush()
+        rows = self.db.execute(
+            f"SELECT {SQL_COLUMNS}, id FROM tasks WHERE date BETWEEN ? AND ? ORDER BY id",
+            (day_string(missing[0]), day_string(missing[-1])))
+        wanted = set(missing)
+        for row in rows:
+            if day_ordinal(row[2]) in wanted:
+                self.index_task(Task.from_values(*row))
+        self.loaded.update(missing)
+
+    def counts_loaded(self, day):
+        return day in self.counted
+
+    def load_counts(self, first, last):
+        # Un seul GROUP BY par plage, ensuite tenu à jour par count_task
+        missing = [day for day in day_range(first, last) if day not in self.counted]
+        if not missing:
+            return
+        self.saver.flush()
+        rows = self.db.execute(
+            "SELECT date, statut, urgence, COUNT(*) FROM tasks WHERE date BETWEEN ? AND ? GROUP BY date, statut, urgence",
+            (day_string(missing[0]), day_string(missing[-1])))
+        wanted = set(missing)
+        for date, statut, urgence, count in rows:
+            task = Task.from_values("", "", date, urgence, statut)
+            if task.day in wanted:
+                self.day_counts.setdefault(task.day, [0] * COUNT_SLOTS)[count_slot(task)] += count
+        self.counted.update(missing)
+
+    def date_bounds(self):
+        self.saver.flush()
+        return tuple(self.db.execute("SELECT MIN(date), MAX(date) FROM tasks").fetchone())
+
+    def iter_tasks(self, first=None, last=None, statut=None, urgence=None):
+        self.saver.flush()
+        where, params = [], []
+        if first:
+            where.append("date >= ?")
+            params.append(first)
+        if last:
+            where.append("date <= ?")
+            params.append(last)
+        if statut:
+            where.append("statut = ?")
+            params.append(statut)
+        if urgence:
+            where.append("urgence = ?")
+            params.append(urgence)
+        query = f"SELECT {SQL_COLUMNS}, id FROM tasks"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        # Le curseur est parcouru ligne à ligne, sans fetchall
+        for row in self.db.execute(query + " ORDER BY id", params):
+            yield Task.from_values(*row)
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        # Même découpage que SearchIndex ; le dernier mot est un préfixe
+        terms = search_terms(query)
+        if not terms:
+            return []
+        self.saver.flush()
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        rows = self.db.execute(
+            f"SELECT {', '.join('tasks.' + f for f in TASK_FIELDS)}, tasks.id FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid"
+            " WHERE tasks_fts MATCH ? ORDER BY tasks.date DESC LIMIT ?", (match, limit))
+        return [Task.from_values(*row) for row in rows]
+
+    def claim_ids(self, count):
+        # Bloc d'identifiants réservé dans la base sous BEGIN IMMEDIATE : deux
+        # instances sur le même tasks.db ne reçoivent jamais le même
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT next_id FROM id_counter").fetchone()
+            highest = self.db.execute("SELECT MAX(id) FROM tasks").fetchone()[0] or 0
+            start = max(row[0] if row else 0, highest + 1)
+            if row:
+                self.db.execute("UPDATE id_counter SET next_id = ?", (start + count,))
+            else:
+                self.db.execute("INSERT INTO id_counter (next_id) VALUES (?)", (start + count,))
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        return start
+
+    def new_id(self):
+        if self.next_id >= self.id_limit:
+            self.next_id = self.claim_ids(ID_BLOCK)
+            self.id_limit = self.next_id + ID_BLOCK
+        task_id = self.next_id
+        self.next_id += 1
+        return task_id
+
+    def add(self, task):
+        task.id = self.new_id()
+        if task.day in self.loaded:
+            self.index_task(task)
+        self.count_task(task, 1)
+        self.saver.submit_sql(SQL_INSERT, (task.id, *task.values()))
+
+    def update(self, task, before):
+        if isinstance(task, Occurrence):
+            return self.update_occurrence(task)
+        if task.day != before.day:
+            self.unindex_task(task, before.day)
+            if task.day in self.loaded:
+                self.index_task(task)
+        self.count_task(before, -1)
+        self.count_task(task, 1)
+        self.saver.submit_sql(SQL_UPDATE, (*task.values(), task.id))
+
+    def update_many(self, changes):
+        changes = self.split_occurrences(changes)
+        if not changes:
+            return
+        rows = []
+        for task, before in changes:
+            if task.day != before.day:
+                self.unindex_task(task, before.day)
+                if task.day in self.loaded:
+                    self.index_task(task)
+            self.count_task(before, -1)
+            self.count_task(task, 1)
+            rows.append((*task.values(), task.id))
+        self.saver.submit_sql(SQL_UPDATE, rows)
+
+    def delete(self, task):
+        if isinstance(task, Occurrence):
+            return self.delete_occurrence(task)
+        self.unindex_task(task)
+        self.count_task(task, -1)
+        self.saver.submit_sql("DELETE FROM tasks WHERE id = ?", (task.id,))
+
+    def delete_many(self, tasks):
+        for task in tasks:
+            self.unindex_task(task)
+            self.count_task(task, -1)
+        self.saver.submit_sql("DELETE FROM tasks WHERE id = ?", [(task.id,) for task in tasks])
+
+    def restore(self, tasks, replace=False):
+        # Tâches rendues par une annulation : leurs identifiants sont conservés
+        if replace:
+            self.saver.submit_sql("DELETE FROM tasks")
+            self.forget()
+        for task in tasks:
+            self.count_task(task, 1)
+            if task.day in self.loaded:
+                self.index_task(task)
+        self.saver.submit_sql(SQL_INSERT, [(task.id, *task.values()) for task in tasks])
+
+    def forget(self):
+        # Jours et compteurs seront relus depuis la base
+        self.tasks_by_date = {}
+        self.loaded = set()
+        self.by_id = {}
+        self.day_counts = {}
+        self.counted = set()
+
+    def begin_import(self, mode):
+        # Les lignes importées reçoivent des clés au-delà de l'existant : en mode
+        # remplacement, les anciennes ne sont supprimées qu'une fois l'import terminé
+        self.import_mode = mode
+        self.import_ranges = []  # [début, fin] des blocs réservés pour l'import
+
+    def import_batch(self, tasks):
+        start = self.claim_ids(len(tasks))
+        if self.import_ranges and self.import_ranges[-1][1] == start - 1:
+            self.import_ranges[-1][1] = start + len(tasks) - 1
+        else:
+            self.import_ranges.append([start, start + len(tasks) - 1])
+        rows = []
+        for task_id, task in enumerate(tasks, start):
+            task.id = task_id
+            rows.append((task.id, *task.values()))
+            if self.import_mode == "merge":
+                self.count_task(task, 1)
+                if task.day in self.loaded:
+                    self.index_task(task)
+        self.saver.submit_sql(SQL_INSERT, rows)
+
+    def end_import(self):
+        if self.import_mode == "replace" and self.import_ranges:
+            # Les blocs d'une autre instance peuvent s'intercaler entre les nôtres
+            ranges = self.import_ranges
+            self.saver.submit_sql("DELETE FROM tasks WHERE id < ?", (ranges[0][0],))
+            gaps = [(a[1] + 1, b[0] - 1) for a, b in zip(ranges, ranges[1:])]
+            if gaps:
+                self.saver.submit_sql("DELETE FROM tasks WHERE id BETWEEN ? AND ?", gaps)
+        if self.import_mode == "replace":
+            self.forget()
+
+    def abort_import(self):
+        self.saver.submit_sql("DELETE FROM tasks WHERE id BETWEEN ? AND ?",
+                              [tuple(bounds) for bounds in self.import_ranges])
+        if self.import_mode == "merge":
+            self.forget()
+
+    def resync(self):
+        # La transaction échouée est rejouée telle quelle
+        failed, self.failed = self.failed, []
+        for statement, params in failed:
+            self.saver.submit_sql(statement, params)
+
+    def close(self):
+        super().close()
+        self.db.close()
+
+def month_of(day):
+    return day_string(day)[:7]
+
+def month_days(month):
+    # Jours (ordinaux) d'un mois AAAA-MM
+    year, number = int(month[:4]), int(month[5:])
+    first = datetime.date(year, number, 1).toordinal()
+    return range(first, first + calendar.monthrange(year, number)[1])
+
+def month_range(first, last):
+    # Mois AAAA-MM de first à last inclus, dates au format AAAA-MM-JJ
+    year, number = int(first[:4]), int(first[5:7])
+    months = []
+    while (year, number) <= (int(last[:4]), int(last[5:7])):
+        months.append(f"{year:04d}-{number:02d}")
+        year, number = (year + 1, 1) if number == 12 else (year, number + 1)
+    return months
+
+def shard_path(month):
+    return os.path.join(SHARD_DIR, month + ".json")
+
+def load_next_id(path=SHARD_NEXT_ID):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return int(f.read())
+
+def save_next_id(next_id, path=SHARD_NEXT_ID):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(next_id))
+    os.replace(tmp, path)
+
+def number_shards():
+    # Identifiants des mois écrits sans eux (répertoire créé avant les
+    # identifiants) ; renvoie le prochain identifiant libre
+    months = {name[:-5]: load_tasks(path=os.path.join(SHARD_DIR, name))
+              for name in sorted(os.listdir(SHARD_DIR)) if name.endswith(".json")}
+    next_id, assigned = assign_ids([task for tasks in months.values() for task in tasks])
+    if assigned:
+        for month, tasks in months.items():
+            save_tasks(tasks, shard_path(month))
+    save_next_id(next_id)
+    return next_id
+
+def migrate_json_to_shards(path=TASKS_FILE):
+    # Migration unique : tasks.json (et son journal) découpé par mois
+    journal = TaskJournal() if os.path.exists(JOURNAL_FILE) else None
+    tasks = load_tasks(journal, path) if os.path.exists(path) else []
+    next_id, _ = assign_ids(tasks)
+    months = {}
+    for task in tasks:
+        months.setdefault(month_of(task.day), []).append(task)
+    for month, month_tasks in months.items():
+        save_tasks(month_tasks, shard_path(month))
+    save_next_id(next_id)
+    return len(tasks)
+
+class ShardedStore(TaskStore):
+    # Un fichier par mois : seuls les mois des semaines affichées sont lus, au
+    # plus SHARD_CACHE à la fois, et une modification ne réécrit que son mois.
+    # Les tâches d'un mois libéré peuvent encore être affichées : update et
+    # delete les retrouvent alors par leur identifiant après relecture du mois.
+    def __init__(self):
+        super().__init__()
+        if not os.path.isdir(SHARD_DIR):
+            os.makedirs(SHARD_DIR)
+            if os.path.exists(TASKS_FILE):
+                migrate_json_to_shards()
+        self.next_id = load_next_id()
+        if self.next_id is None:
+            self.next_id = number_shards()
+        self.shards = OrderedDict()  # mois -> {id: tâche}, du moins au plus récemment utilisé
+        self.counted = set()  # mois présents dans day_counts
+        self.month_indexes = OrderedDict()  # mois -> SearchIndex de copies, au plus SHARD_CACHE comme les mois
+        self.failed = {}
+        self.saver = SaveWorker(shards=self)
+
+    def write_shards(self, shards):
+        # Appelé depuis le thread d'écriture ; un mois vide n'a plus de fichier.
+        # Le compteur est écrit après les mois : il ne peut pas être en retard sur eux.
+        for month, tasks in shards.items():
+            try:
+                if tasks:
+                    save_tasks(tasks, shard_path(month))
+                elif os.path.exists(shard_path(month)):
+                    os.remove(shard_path(month))
+            except Exception:
+                self.failed.update({m: t for m, t in shards.items() if m not in self.failed})
+                raise
+        save_next_id(self.next_id)
+
+    def stored_months(self):
+        self.saver.flush()
+        return sorted(name[:-5] for name in os.listdir(SHARD_DIR) if name.endswith(".json"))
+
+    @perf.timed("shards.read")
+    def read_shard(self, month):
+        # Les écritures en attente doivent être visibles
+        self.saver.flush()
+        return load_tasks(path=shard_path(month))
+
+    def month_tasks(self, month):
+        # Tâches d'un mois, sans le faire entrer dans le cache s'il n'y est pas
+        tasks = self.shards.get(month)
+        return list(tasks.values()) if tasks is not None else self.read_shard(month)
+
+    def count_month(self, month, tasks):
+        for day in month_days(month):
+            self.day_counts.pop(day, None)
+        self.day_counts.update(build_day_counts(tasks))
+        self.counted.add(month)
+
+    def load_shard(self, month):
+        tasks = self.shards.get(month)
+        if tasks is not None:
+            self.shards.move_to_end(month)
+            return tasks
+        tasks = self.shards[month] = {}
+        for task in self.read_shard(month):
+            tasks[task.id] = task
+            self.index_task(task)
+        if month not in self.counted:
+            self.count_month(month, tasks.values())
+        return tasks
+
+    def evict(self, keep=()):
+        for month in list(self.shards):
+            if len(self.shards) <= SHARD_CACHE:
+                return
+            if month not in keep:
+                for task_id in self.shards.pop(month):
+                    self.by_id.pop(task_id, None)
+                for day in month_days(month):
+                    self.tasks_by_date.pop(day, None)
+
+    def load_range(self, first, last):
+        self.expand_recurrences(first, last)
+        months = month_range(first, last)
+        for month in months:
+            self.load_shard(month)
+        self.evict(keep=months)
+
+    def counts_loaded(self, day):
+        return month_of(day) in self.counted
+
+    def load_counts(self, first, last):
+        # Les mois non chargés sont lus pour leurs compteurs seulement
+        for month in month_range(first, last):
+            if month not in self.counted:
+                self.count_month(month, self.month_tasks(month))
+
+    def date_bounds(self):
+        months = self.stored_months()
+        if not months:
+            return None, None
+        low = min(t.day for t in self.month_tasks(months[0]))
+        high = max(t.day for t in self.month_tasks(months[-1]))
+        return day_string(low), day_string(high)
+
+    def iter_tasks(self, first=None, last=None, statut=None, urgence=None):
+        for month in self.stored_months():
+            if first and month < first[:7] or last and month > last[:7]:
+                continue
+            yield from filter_tasks(self.month_tasks(month), first, last, statut, urgence)
+
+    def month_index(self, month):
+        # Index d'un mois, reconstruit après modification ; les moins récemment
+        # cherchés sont libérés comme les mois eux-mêmes
+        index = self.month_indexes.get(month)
+        if index is not None:
+            self.month_indexes.move_to_end(month)
+            return index
+        index = self.month_indexes[month] = SearchIndex(t.copy() for t in self.month_tasks(month))
+        while len(self.month_indexes) > SHARD_CACHE:
+            self.month_indexes.popitem(last=False)
+        return index
+
+    def prepare_search(self, budget=None):
+        # Seuls les mois les plus récents, lus en premier par search ; un mois
+        # par pas quand budget est donné
+        for month in self.stored_months()[-SHARD_CACHE:]:
+            if month not in self.month_indexes:
+                self.month_index(month)
+                if budget is not None:
+                    return False
+        return True
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        # Mois lus un à un, du plus récent au plus ancien : on s'arrête dès que
+        # la limite est atteinte
+        found = []
+        for month in reversed(self.stored_months()):
+            found.extend(self.month_index(month).search(query, limit - len(found)))
+            if len(found) >= limit:
+                break
+        return found
+
+    def persist(self, month):
+        self.month_indexes.pop(month, None)
+        self.saver.submit_shard(month, self.shards[month].values())
+
+    def new_id(self):
+        task_id = self.next_id
+        self.next_id += 1
+        return task_id
+
+    def live_task(self, task, day):
+        # La tâche telle qu'elle est dans son mois, relu s'il a été libéré entre-temps
+        self.load_shard(month_of(day))
+        live = self.by_id.get(task.id)
+        if live is None:
+            raise ValueError("tâche absente de la liste")
+        return live
+
+    def add(self, task):
+        task.id = self.new_id()
+        month = month_of(task.day)
+        self.load_shard(month)[task.id] = task
+        self.index_task(task)
+        self.count_task(task, 1)
+        self.persist(month)
+        self.evict(keep=(month,))
+
+    def move(self, task, before):
+        # Remplace l'ancienne version de la tâche par task, dans son nouveau mois si besoin
+        live = self.live_task(task, before.day)
+        old, new = month_of(before.day), month_of(task.day)
+        self.unindex_task(live, before.day)
+        self.count_task(before, -1)
+        if old != new:
+            del self.shards[old][task.id]
+            self.persist(old)
+        self.load_shard(new)[task.id] = task
+        self.index_task(task)
+        self.count_task(task, 1)
+        self.persist(new)
+        return old, new
+
+    def update(self, task, before):
+        if isinstance(task, Occurrence):
+            return self.update_occurrence(task)
+        self.evict(keep=self.move(task, before))
+
+    def update_many(self, changes):
+        changes = self.split_occurrences(changes)
+        keep = set()
+        for task, before in changes:
+            keep.update(self.move(task, before))
+        self.evict(keep)
+
+    def delete(self, task):
+        if isinstance(task, Occurrence):
+            return self.delete_occurrence(task)
+        live = self.live_task(task, task.day)
+        month = month_of(task.day)
+        del self.shards[month][task.id]
+        self.unindex_task(live)
+        self.count_task(live, -1)
+        self.persist(month)
+        self.evict(keep=(month,))
+
+    def delete_many(self, tasks):
+        months = set()
+        for task in tasks:
+            live = self.live_task(task, task.day)
+            month = month_of(task.day)
+            del self.shards[month][task.id]
+            self.unindex_task(live)
+            self.count_task(live, -1)
+            months.add(month)
+        for month in months:
+            self.persist(month)
+        self.evict(months)
+
+    def restore(self, tasks, replace=False):
+        # Tâches rendues par une annulation : leurs identifiants sont conservés
+        self.begin_import("replace" if replace else "merge")
+        for task in tasks:
+            self.imported.setdefault(month_of(task.day), []).append(task)
+        self.end_import()
+
+    def begin_import(self, mode):
+        self.import_mode = mode
+        self.imported = {}  # mois -> tâches importées
+
+    def import_batch(self, tasks):
+        for task in tasks:
+            task.id = self.new_id()
+            self.imported.setdefault(month_of(task.day), []).append(task)
+
+    def end_import(self):
+        imported, self.imported = self.imported, {}
+        if self.import_mode == "replace":
+            for month in self.stored_months():
+                if month not in imported:
+                    self.saver.submit_shard(month, [])
+            self.shards = OrderedDict()
+            self.tasks_by_date = {}
+            self.by_id = {}
+            self.day_counts = {}
+            self.counted = set()
+            self.month_indexes = OrderedDict()
+            for month, tasks in imported.items():
+                self.saver.submit_shard(month, tasks)
+            return
+        for month, tasks in imported.items():
+            if month in self.shards:
+                for task in tasks:
+                    self.shards[month][task.id] = task
+                    self.index_task(task)
+                    self.count_task(task, 1)
+                self.persist(month)
+            else:
+                self.month_indexes.pop(month, None)
+                self.counted.discard(month)
+                self.saver.submit_shard(month, self.read_shard(month) + tasks)
+
+    def abort_import(self):
+        self.imported = {}
+
+    def resync(self):
+        # Les mois dont l'écriture a échoué sont soumis à nouveau
+        failed, self.failed = self.failed, {}
+        for month, tasks in failed.items():
+            self.saver.submit_shard(month, tasks)
+
+def open_store():
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteStore()
+    if STORAGE_BACKEND == "mois":
+        return ShardedStore()
+    return JsonStore()
@@ -0,0 +1,27 @@
+# Chaque test travaille dans son propre répertoire temporaire : les fichiers
+# de données (tasks.json, journal, tasks.db, tasks/) y sont créés et supprimés.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "SAVE_DELAY", 0.01)
+    monkeypatch.setattr(storage, "WATCH_INTERVAL", 0.05)
+    workers = []
+    start = storage.SaveWorker.start
+    def tracked(worker):
+        workers.append(worker)
+        start(worker)
+    monkeypatch.setattr(storage.SaveWorker, "start", tracked)
+    yield tmp_path
+    # Un test en échec laisse ses stockages ouverts : leurs threads ne doivent
+    # pas écrire dans le répertoire courant une fois celui-ci rétabli
+    for worker in workers:
+        worker.close()
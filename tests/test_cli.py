@@ -0,0 +1,33 @@
+# Ligne de commande
+import json
+
+import pytest
+
+import cli
+import storage
+from core import Recurrence, Task, day_ordinal
+
+def test_invalid_task_exits_with_one_line(workdir, capsys):
+    with open("bad.ndjson", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"titre": "x", "date": "2025-13-40"}) + "\n")
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["add", "bad.ndjson"])
+    assert exit_info.value.code == 2
+    err = capsys.readouterr().err
+    assert err.startswith("cli.py: error: ") and err.count("\n") == 1
+
+def test_list_titre_ignores_accents_and_occurrences(workdir, capsys):
+    store = storage.open_store()
+    day = day_ordinal("2026-10-14")
+    store.add(Task("Élève absent", "", day))
+    store.add(Task("Réunion", "", day))
+    store.add_recurrence(Recurrence(None, "Élève répété", "", 0, "chaque jour", day))
+    store.close()
+    cli.main(["list", "--from", "2026-10-14", "--to", "2026-10-14", "--format", "ndjson"])
+    plain = capsys.readouterr().out
+    cli.main(["list", "--from", "2026-10-14", "--to", "2026-10-14", "--format", "ndjson", "--titre", "eleve"])
+    assert capsys.readouterr().out != plain
+    cli.main(["list", "--from", "2026-10-14", "--to", "2026-10-14", "--format", "ndjson", "--titre", "e"])
+    assert capsys.readouterr().out == plain
+    cli.main(["list", "--format", "json", "--titre", "ELEVE"])
+    assert [task["titre"] for task in json.loads(capsys.readouterr().out)] == ["Élève absent"]
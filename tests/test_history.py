@@ -0,0 +1,72 @@
+# Annuler / rétablir, sur chaque stockage
+import pytest
+
+import history
+import storage
+from core import Recurrence, Task, day_ordinal
+from history import History
+
+DAY = day_ordinal("2026-10-14")
+
+def state(store):
+    return sorted((task.id, task.values()) for task in store.iter_tasks())
+
+def some_tasks(prefix, count):
+    return [Task(f"{prefix}{n}", "", DAY - 3 + n % 7) for n in range(count)]
+
+def test_oversized_import_stops_collecting_and_clears(workdir, monkeypatch):
+    monkeypatch.setattr(history, "HISTORY_MAX_TASKS", 10)
+    store = storage.JsonStore()
+    undo = History(store)
+    undo.add(Task("before", "", DAY))
+    undo.begin_import("merge")
+    for batch in range(4):
+        undo.import_batch([Task(f"i{batch}-{n}", "", DAY) for n in range(4)])
+    assert undo.importing[2] is None
+    undo.end_import()
+    assert not undo.undo()
+    assert len(store.tasks) == 17
+    store.close()
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "mois"])
+def test_undo_redo_each_backend(workdir, monkeypatch, backend):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", backend)
+    storage.save_tasks(some_tasks("t", 20))
+    store = storage.open_store()
+    store.load_range("2026-10-11", "2026-10-17")
+    undo = History(store)
+    states = [state(store)]
+    task = Task("x", "", DAY)
+    undo.add(task)
+    states.append(state(store))
+    before = task.copy()
+    task.titre = "y"
+    task.day -= 45  # vers un mois qui n'est pas chargé
+    undo.update(task, before)
+    states.append(state(store))
+    undo.delete(store.day_tasks(DAY - 1)[0])
+    states.append(state(store))
+    undo.begin_import("merge")
+    undo.import_batch(some_tasks("m", 15))
+    undo.end_import()
+    states.append(state(store))
+    undo.begin_import("replace")
+    undo.import_batch(some_tasks("r", 5))
+    undo.end_import()
+    states.append(state(store))
+    undo.add_recurrence(Recurrence(None, "rule", "", 0, "chaque jour", DAY - 10))
+    assert store.recurrences
+    assert undo.undo()
+    assert not store.recurrences
+    for i in range(len(states) - 1, 0, -1):
+        assert undo.undo()
+        assert state(store) == states[i - 1]
+    assert not undo.undo()
+    for i in range(1, len(states)):
+        assert undo.redo()
+        assert state(store) == states[i]
+    assert store.flush() is None
+    store.close()
+    reopened = storage.open_store()
+    assert state(reopened) == states[-1]
+    reopened.close()
@@ -0,0 +1,34 @@
+# Stockage SQLite partagé par plusieurs instances
+import storage
+from core import Task, day_ordinal
+
+DAY = day_ordinal("2026-10-14")
+
+def test_two_instances_never_share_an_id(workdir):
+    a = storage.SqliteStore()
+    b = storage.SqliteStore()
+    for n in range(storage.ID_BLOCK + 5):
+        a.add(Task(f"a{n}", "", DAY))
+        b.add(Task(f"b{n}", "", DAY))
+    assert a.flush() is None
+    assert b.flush() is None
+    a.close()
+    b.close()
+    reopened = storage.SqliteStore()
+    assert len(list(reopened.iter_tasks())) == 2 * (storage.ID_BLOCK + 5)
+    reopened.close()
+
+def test_aborted_import_keeps_other_instance_tasks(workdir):
+    a = storage.SqliteStore()
+    b = storage.SqliteStore()
+    a.add(Task("kept", "", DAY))
+    a.begin_import("merge")
+    a.import_batch([Task(f"i{n}", "", DAY) for n in range(3)])
+    b.add(Task("from B", "", DAY))
+    a.import_batch([Task(f"j{n}", "", DAY) for n in range(3)])
+    b.flush()
+    a.abort_import()
+    a.flush()
+    assert sorted(t.titre for t in a.iter_tasks()) == ["from B", "kept"]
+    a.close()
+    b.close()
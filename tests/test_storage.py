@@ -0,0 +1,143 @@
+# Stockage tasks.json : journal, lecture en flux, requêtes
+import io
+import json
+import os
+
+import pytest
+
+import storage
+from core import Recurrence, Task, day_ordinal
+
+DAY = day_ordinal("2026-10-14")
+
+def parse_array(text, chunk_size=storage.IMPORT_CHUNK_SIZE):
+    return list(storage.iter_json_array(io.BytesIO(text.encode("utf-8")), chunk_size))
+
+def test_iter_tasks_short_range_leaves_out_occurrences(workdir):
+    store = storage.JsonStore()
+    for n in range(10):
+        store.add(Task(f"t{n}", "", DAY + n))
+    store.add_recurrence(Recurrence(None, "chaque jour", "", 0, "chaque jour", DAY))
+    store.load_range("2026-10-14", "2026-10-15")
+    tasks = list(store.iter_tasks("2026-10-14", "2026-10-15"))
+    assert sorted(task.titre for task in tasks) == ["t0", "t1"]
+    store.close()
+
+@pytest.mark.parametrize("text", ["[1 2]", "[,1,2]", "[1,,2]", "[1,2,]", '{"a": 1 "b": 2}'])
+def test_parser_rejects_missing_or_extra_commas(text):
+    with pytest.raises(ValueError):
+        if text.startswith("{"):
+            list(storage.iter_json_object(io.BytesIO(text.encode("utf-8"))))
+        else:
+            parse_array(text)
+
+def test_parser_accepts_empty_and_spaced_arrays():
+    assert parse_array("[]") == []
+    assert parse_array(" [ 1 ,\n 2 ] ") == [1, 2]
+
+JSON_SAMPLE = [
+    {"titre": "Élève 🎓", "description": "a\n\"b\"", "date": "2026-10-14"},
+    -12.5e3, 1234567890, "", [], {}, [[1, {"x": [2]}]], True, None, "é" * 40,
+]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 8, 64])
+def test_parser_small_chunks(chunk_size):
+    text = "\ufeff[\n" + ",\n ".join(json.dumps(item, ensure_ascii=False) for item in JSON_SAMPLE) + "\n]\n"
+    assert parse_array(text, chunk_size) == JSON_SAMPLE
+    keyed = {f"2026-10-{n:02d}": item for n, item in enumerate(JSON_SAMPLE, 1)}
+    f = io.BytesIO(json.dumps(keyed, ensure_ascii=False, indent=1).encode("utf-8"))
+    assert dict(storage.iter_json_object(f, chunk_size)) == keyed
+
+@pytest.mark.parametrize("chunk_size", [1, 3])
+def test_parser_rejects_truncated_file(chunk_size):
+    with pytest.raises(ValueError):
+        parse_array('[{"titre": "a"}, {"titre"', chunk_size)
+
+def interrupt(monkeypatch, step):
+    # Arrêt brutal simulé à une étape du compactage
+    def crash(*args):
+        raise OSError("arrêt simulé")
+    if step == "dump":
+        monkeypatch.setattr(storage, "dump_tasks", crash)
+        return
+    target = storage.TASKS_FILE if step == "tasks" else storage.JOURNAL_FILE
+    replace = os.replace
+    monkeypatch.setattr(storage.os, "replace", lambda src, dst: crash() if dst == target else replace(src, dst))
+
+@pytest.mark.parametrize("step", ["dump", "tasks", "journal"])
+def test_journal_replay_after_interrupted_compaction(workdir, monkeypatch, step):
+    store = storage.JsonStore()
+    for titre in ("a", "b", "c"):
+        store.add(Task(titre, "", DAY))
+    store.delete(next(task for task in store.tasks.values() if task.titre == "b"))
+    store.close()  # entrées écrites, sans compactage
+    journal = storage.TaskJournal()
+    tasks = storage.load_tasks(journal)
+    with monkeypatch.context() as patch:
+        interrupt(patch, step)
+        with pytest.raises(OSError):
+            journal.write_snapshot(tasks)
+    reopened = storage.JsonStore()
+    assert sorted(task.titre for task in reopened.tasks.values()) == ["a", "c"]
+    reopened.add(Task("d", "", DAY))
+    reopened.close()
+    again = storage.JsonStore()
+    assert sorted(task.titre for task in again.tasks.values()) == ["a", "c", "d"]
+    assert len({task.id for task in again.tasks.values()}) == 3
+    again.close()
+
+def test_sharded_search_keeps_few_month_indexes(workdir, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "mois")
+    storage.save_tasks([Task(f"élève {n}", "", DAY - 31 * n) for n in range(20)])
+    store = storage.open_store()
+    store.prepare_search()
+    assert len(store.month_indexes) <= storage.SHARD_CACHE
+    assert [task.titre for task in store.search("eleve", limit=3)] == ["élève 0", "élève 1", "élève 2"]
+    assert len(store.search("eleve")) == 20
+    assert len(store.month_indexes) <= storage.SHARD_CACHE
+    store.close()
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_search_folds_ligatures_on_each_backend(workdir, monkeypatch, backend):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", backend)
+    store = storage.open_store()
+    for titre in ("Cœur de ville", "ŒUVRE", "Ex æquo", "Straße"):
+        store.add(Task(titre, "", DAY))
+    for query, titre in (("coeur", "Cœur de ville"), ("oeuvre", "ŒUVRE"), ("cœur", "Cœur de ville"),
+                         ("aequo", "Ex æquo"), ("strasse", "Straße"), ("STRAẞE", "Straße")):
+        assert [task.titre for task in store.search(query)] == [titre]
+    store.close()
+
+def test_sqlite_index_rebuilt_for_older_database(workdir, monkeypatch):
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "sqlite")
+    store = storage.open_store()
+    store.add(Task("Cœur", "", DAY))
+    store.close()
+    import sqlite3
+    db = sqlite3.connect(storage.DB_FILE)
+    db.executescript(storage.SQL_DROP_FTS + "PRAGMA user_version = 0;")
+    db.close()
+    reopened = storage.open_store()
+    assert [task.titre for task in reopened.search("coeur")] == ["Cœur"]
+    reopened.close()
+
+def test_search_index_built_in_steps_follows_changes(workdir):
+    store = storage.JsonStore()
+    for n in range(50):
+        store.add(Task(f"tâche {n}", "", DAY + n % 7))
+    assert not store.prepare_search(10)
+    renamed = store.tasks[next(iter(store.tasks))]
+    before = renamed.copy()
+    renamed.titre = "renommée"
+    store.update(renamed, before)
+    store.delete(next(t for t in store.tasks.values() if t.titre == "tâche 49"))
+    store.add(Task("ajoutée", "", DAY))
+    steps = 1
+    while not store.prepare_search(10):
+        steps += 1
+    assert steps > 3
+    assert len(store.search("tache")) == 48
+    assert [t.titre for t in store.search("renommee")] == ["renommée"]
+    assert [t.titre for t in store.search("ajout")] == ["ajoutée"]
+    assert store.search("49") == []
+    store.close()
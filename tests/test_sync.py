@@ -0,0 +1,212 @@
+# Plusieurs instances sur le même tasks.json (fenêtres, cli.py)
+import json
+import time
+
+import storage
+from core import Task, day_ordinal
+
+DAY = day_ordinal("2026-10-14")
+
+def open_store(*titles):
+    store = storage.JsonStore()
+    for titre in titles:
+        store.add(Task(titre, "", DAY))
+    store.saver.flush()
+    return store
+
+def wait_changes(store, timeout=5, until=None):
+    # Les modifications extérieures arrivent par le thread d'écriture, parfois
+    # en plusieurs lectures : until dit quand tout est arrivé
+    deadline = time.monotonic() + timeout
+    days = set()
+    while time.monotonic() < deadline:
+        days |= store.poll_changes()
+        if days and (until is None or until()):
+            return days
+        time.sleep(0.02)
+    return days
+
+def titles(store):
+    return sorted(task.titre for task in store.tasks.values())
+
+def test_reload_numbers_tasks_written_without_ids(workdir):
+    store = open_store("a", "b")
+    # Un script réécrit tasks.json dans l'ancienne forme, sans identifiants
+    with open(storage.TASKS_FILE, "w", encoding="utf-8") as f:
+        json.dump([{"titre": t, "description": "", "date": "2026-10-14", "urgence": "🟢", "statut": "à faire"}
+                   for t in ("x", "y", "z")], f)
+    assert wait_changes(store) == {DAY}
+    assert titles(store) == ["x", "y", "z"]
+    assert None not in store.tasks
+    store.add(Task("n", "", DAY))
+    store.flush()
+    store.close()
+    reopened = storage.JsonStore()
+    assert titles(reopened) == ["n", "x", "y", "z"]
+    assert sorted(reopened.tasks) == sorted(store.tasks)
+    reopened.close()
+
+def test_closing_two_windows_keeps_both_additions(workdir):
+    storage.JsonStore().close()
+    a = open_store()
+    b = open_store()
+    a.add(Task("from-A", "", DAY))
+    b.add(Task("from-B", "", DAY))
+    # Chaque fermeture compacte le journal dans un nouvel instantané
+    assert b.flush() is None
+    b.close()
+    assert a.flush() is None
+    a.close()
+    reopened = storage.JsonStore()
+    assert titles(reopened) == ["from-A", "from-B"]
+    reopened.close()
+
+def test_bulk_change_merges_with_outside_rewrite(workdir):
+    a = open_store("a1", "a2", "shared")
+    b = storage.JsonStore()
+    shared = next(t for t in b.tasks.values() if t.titre == "shared")
+    before = shared.copy()
+    shared.titre = "renamed by B"
+    b.update(shared, before)
+    b.flush()
+    b.close()
+    # Modification en masse de A : instantané écrit après celui de B
+    changes = []
+    for task in a.tasks.values():
+        if task.titre.startswith("a"):
+            changes.append((task, task.copy()))
+            task.statut = 1
+    a.update_many(changes)
+    a.flush()
+    a.close()
+    reopened = storage.JsonStore()
+    assert titles(reopened) == ["a1", "a2", "renamed by B"]
+    assert sorted(t.statut for t in reopened.tasks.values()) == [0, 1, 1]
+    reopened.close()
+
+def test_outside_change_read_by_save_worker(workdir):
+    a = open_store("a1", "a2")
+    b = storage.JsonStore()
+    b.add(Task("from-B", "", DAY))
+    b.flush()
+    # Le thread d'écriture de A lit l'entrée de B sans que l'interface ne fasse rien
+    deadline = time.monotonic() + 5
+    while a.saver.external.empty() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not a.saver.external.empty()
+    assert "from-B" not in titles(a)
+    # Un instantané soumis avant la fusion garde quand même la tâche de B
+    changes = []
+    for task in a.tasks.values():
+        changes.append((task, task.copy()))
+        task.statut = 1
+    a.update_many(changes)
+    a.flush()
+    assert wait_changes(a) == {DAY}
+    assert titles(a) == ["a1", "a2", "from-B"]
+    a.close()
+    b.close()
+    reopened = storage.JsonStore()
+    assert titles(reopened) == ["a1", "a2", "from-B"]
+    assert all(t.statut == 1 for t in reopened.tasks.values() if t.titre.startswith("a"))
+    reopened.close()
+
+def test_both_windows_add_while_open(workdir):
+    storage.JsonStore().close()
+    a = open_store()
+    b = open_store()
+    for n in range(storage.ID_BLOCK + 3):
+        a.add(Task(f"a{n}", "", DAY))
+        b.add(Task(f"b{n}", "", DAY))
+    a.saver.flush()
+    b.saver.flush()
+    total = 2 * (storage.ID_BLOCK + 3)
+    assert wait_changes(a, until=lambda: len(a.tasks) == total) == {DAY}
+    assert wait_changes(b, until=lambda: len(b.tasks) == total) == {DAY}
+    assert titles(a) == titles(b)
+    a.close()
+    b.close()
+
+def test_outside_delete_and_edit_reach_the_other_window(workdir):
+    a = open_store("keep", "drop", "edit")
+    b = storage.JsonStore()
+    b.delete(next(t for t in b.tasks.values() if t.titre == "drop"))
+    edited = next(t for t in b.tasks.values() if t.titre == "edit")
+    before = edited.copy()
+    edited.day += 1
+    b.update(edited, before)
+    b.saver.flush()
+    assert wait_changes(a) == {DAY, DAY + 1}
+    assert [t.titre for t in a.day_tasks(DAY)] == ["keep"]
+    assert [t.titre for t in a.day_tasks(DAY + 1)] == ["edit"]
+    a.close()
+    b.close()
+
+def test_same_task_edited_twice_keeps_last_write(workdir):
+    a = open_store("shared")
+    b = storage.JsonStore()
+    for store, titre in ((a, "from A"), (b, "from B")):
+        task = next(iter(store.tasks.values()))
+        before = task.copy()
+        task.titre = titre
+        store.update(task, before)
+        store.saver.flush()
+    assert wait_changes(a) == {DAY}
+    assert titles(a) == ["from B"]
+    a.close()
+    b.close()
+    reopened = storage.JsonStore()
+    assert titles(reopened) == ["from B"]
+    reopened.close()
+
+def test_resync_after_write_error_keeps_outside_changes(workdir, monkeypatch):
+    a = open_store("old")
+    b = storage.JsonStore()
+    write_lines = a.journal.write_lines
+    def fail_once(lines):
+        monkeypatch.setattr(a.journal, "write_lines", write_lines)
+        raise OSError("disque plein")
+    monkeypatch.setattr(a.journal, "write_lines", fail_once)
+    a.add(Task("from A", "", DAY))
+    assert isinstance(a.flush(), OSError)
+    b.add(Task("from B", "", DAY))
+    b.close()
+    a.resync()
+    assert a.flush() is None
+    a.close()
+    reopened = storage.JsonStore()
+    assert titles(reopened) == ["from A", "from B", "old"]
+    reopened.close()
+
+def test_id_blocks_reserved_by_save_worker(workdir, monkeypatch):
+    store = storage.JsonStore()
+    store.saver.flush()
+    def on_tk_thread(count):
+        raise AssertionError("bloc réservé par l'interface")
+    monkeypatch.setattr(store, "reserve_ids", on_tk_thread)
+    for n in range(3 * storage.ID_BLOCK):
+        store.add(Task(f"t{n}", "", DAY))
+        if n % 16 == 0:
+            store.saver.flush()
+    assert len(store.tasks) == 3 * storage.ID_BLOCK
+    store.close()
+
+def test_own_write_after_reading_outside_rewrite_is_kept(workdir):
+    a = open_store("old")
+    b = storage.JsonStore()
+    b.add(Task("from B", "", DAY))
+    assert b.flush() is None  # compactage : tasks.json remplacé
+    b.close()
+    deadline = time.monotonic() + 5
+    while a.saver.external.empty() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    # Écrite après la lecture du nouveau tasks.json, avant la fusion par l'interface
+    a.add(Task("from A", "", DAY))
+    a.saver.flush()
+    assert wait_changes(a) == {DAY}
+    assert titles(a) == ["from A", "from B", "old"]
+    assert a.flush() is None
+    a.close()
+    reopened = storage.JsonStore()
+    assert titles(reopened) == ["from A", "from B", "old"]
+    reopened.close()